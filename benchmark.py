@@ -0,0 +1,270 @@
+from environment import KebabHunterEnvironment
+from vector_env import VectorKebabHunterEnv
+from q_learning import QLearningAgent
+from rollout import FusedRollout
+from seeding import make_rng
+import rollout
+import numpy as np
+import subprocess
+import tracemalloc
+import argparse
+import platform
+import json
+import time
+
+# Operations timed for throughput, and individually timed for the latency percentiles
+DEFAULT_OPERATIONS = 100000
+LATENCY_SAMPLES = 20000
+MEMORY_OPERATIONS = 2000
+# Step limit of the training episodes, train_agent's default
+TRAINING_MAX_STEPS = 100
+
+
+def measure_latencies(setup, operation, samples):
+    """Per-call timings of `operation(context)` in nanoseconds, on a fresh context from setup()."""
+    context = setup()
+    latencies = np.empty(samples)
+    clock = time.perf_counter_ns
+    for i in range(samples):
+        begin = clock()
+        operation(context)
+        latencies[i] = clock() - begin
+    return latencies
+
+
+def measure_peak_memory(setup, operation, operations):
+    """Peak traced memory of `operations` calls, setup() runs before tracing so building the context is excluded."""
+    context = setup()
+    tracemalloc.start()
+    for _ in range(operations):
+        operation(context)
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak_memory
+
+
+def make_result(name, params, operations, elapsed, items, latencies, peak_memory):
+    return {
+        "name": name,
+        "params": params,
+        "operations": operations,
+        "seconds": elapsed,
+        "ops_per_sec": operations / elapsed,
+        "items_per_sec": items / elapsed,
+        "p50_us": float(np.percentile(latencies, 50)) / 1000,
+        "p99_us": float(np.percentile(latencies, 99)) / 1000,
+        "peak_memory_bytes": peak_memory,
+    }
+
+
+def measure(name, params, setup, operation, operations=DEFAULT_OPERATIONS, items_per_operation=1):
+    """
+    Times `operation(context)` three ways: a bulk loop for throughput, per-call timers for p50/p99
+    latency and a short traced run for peak memory. setup() builds a fresh context for each pass.
+    """
+    context = setup()
+    start = time.perf_counter()
+    for _ in range(operations):
+        operation(context)
+    elapsed = time.perf_counter() - start
+
+    latencies = measure_latencies(setup, operation, min(operations, LATENCY_SAMPLES))
+    peak_memory = measure_peak_memory(setup, operation, min(operations, MEMORY_OPERATIONS))
+    return make_result(name, params, operations, elapsed, operations * items_per_operation, latencies, peak_memory)
+
+
+def bench_environment(grid_size, num_bombs, seed, operations):
+    """KebabHunterEnvironment.step, reset and get_state."""
+    params = {"grid_size": grid_size, "num_bombs": num_bombs}
+
+    def setup():
+        env = KebabHunterEnvironment(grid_size=grid_size, num_bombs=num_bombs, seed=seed)
+        actions = make_rng(seed).integers(0, 4, operations).tolist()
+        return {"env": env, "actions": actions, "index": 0}
+
+    def step(context):
+        env = context["env"]
+        context["index"] += 1
+        if env.step(context["actions"][context["index"] % operations])[2]:
+            env.reset()
+
+    return [
+        measure("env_step", params, setup, step, operations),
+        measure("env_reset", params, setup, lambda context: context["env"].reset(), operations),
+        measure("env_get_state", params, setup, lambda context: context["env"].get_state(), operations),
+    ]
+
+
+def bench_agent(seed, operations):
+    """QLearningAgent.update_q_value and choose_action on states drawn from the environment."""
+    def setup():
+        env = KebabHunterEnvironment(seed=seed)
+        states = [env.reset() for _ in range(1024)]
+        agent = QLearningAgent(len(states[0]), 4, seed=seed)
+        return {"agent": agent, "states": states, "index": 0}
+
+    def update(context):
+        index = context["index"] = (context["index"] + 1) % 1023
+        context["agent"].update_q_value(context["states"][index], index % 4, -0.1, context["states"][index + 1])
+
+    def choose(context):
+        index = context["index"] = (context["index"] + 1) % 1024
+        context["agent"].choose_action(context["states"][index])
+
+    return [
+        measure("agent_update", {}, setup, update, operations),
+        measure("agent_choose_action", {}, setup, choose, operations),
+    ]
+
+
+def bench_batched(grid_size, num_bombs, batch_size, seed, operations):
+    """VectorKebabHunterEnv.step and the batched agent update, throughput counted in transitions."""
+    params = {"grid_size": grid_size, "num_bombs": num_bombs, "batch_size": batch_size}
+    operations = max(10, operations // batch_size)
+
+    def setup():
+        env = VectorKebabHunterEnv(batch_size, grid_size=grid_size, num_bombs=num_bombs, seed=seed)
+        agent = QLearningAgent(8, 4, seed=seed)
+        states = env.get_states()
+        next_states, rewards, _ = env.step(agent.choose_actions(states))
+        return {"env": env, "agent": agent, "batch": (states, agent.choose_actions(states), rewards, next_states)}
+
+    def vector_step(context):
+        context["env"].step(context["agent"].choose_actions(context["env"].states))
+
+    def batch_update(context):
+        context["agent"].update_q_values(*context["batch"])
+
+    return [
+        measure("vector_env_step", params, setup, vector_step, operations, batch_size),
+        measure("agent_update_batch", params, setup, batch_update, operations, batch_size),
+    ]
+
+
+def bench_training(grid_size, num_bombs, seed, episodes):
+    """
+    train_agent's episode loop (reset, choose_action, step, update_q_value, decay_exploration), one episode per
+    operation on a pre-built environment and agent, so building the layout table and checkpointing are excluded.
+    """
+    params = {"grid_size": grid_size, "num_bombs": num_bombs}
+
+    def setup():
+        env = KebabHunterEnvironment(grid_size=grid_size, num_bombs=num_bombs, seed=seed)
+        return {"env": env, "agent": QLearningAgent(8, 4, seed=seed)}
+
+    def episode(context):
+        env, agent = context["env"], context["agent"]
+        state = env.reset()
+        for _ in range(TRAINING_MAX_STEPS):
+            action = agent.choose_action(state)
+            next_state, reward, done = env.step(action)
+            agent.update_q_value(state, action, reward, next_state)
+            state = next_state
+            if done:
+                break
+        agent.decay_exploration()
+
+    return measure("train_agent", params, setup, episode, episodes)
+
+
+def bench_rollout(grid_size, num_bombs, seed, episodes):
+    """
+    FusedRollout training episodes, throughput counted in environment steps. Throughput comes from one
+    kernel call over every episode, the latency percentiles from single-episode calls.
+    """
+    params = {"grid_size": grid_size, "num_bombs": num_bombs, "compiled": rollout.COMPILED}
+
+    def setup():
+        env = KebabHunterEnvironment(grid_size=grid_size, num_bombs=num_bombs, seed=seed)
+        fused = FusedRollout(env, QLearningAgent(8, 4, seed=seed), TRAINING_MAX_STEPS)
+        fused.run(100)  # Loads or compiles the kernel and draws the first block outside the measurement
+        return fused
+
+    def episode(fused):
+        fused.run(1)
+
+    fused = setup()
+    start = time.perf_counter()
+    steps = int(fused.run(episodes)["steps"].sum())
+    elapsed = time.perf_counter() - start
+
+    latencies = measure_latencies(setup, episode, min(episodes, LATENCY_SAMPLES))
+    peak_memory = measure_peak_memory(setup, episode, min(episodes, MEMORY_OPERATIONS))
+    return make_result("fused_rollout", params, episodes, elapsed, steps, latencies, peak_memory)
+
+
+def get_metadata():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+    }
+
+
+def run_benchmarks(grid_sizes=(3,), num_bombs=(2,), batch_sizes=(1, 64, 1024), seed=0,
+                   operations=DEFAULT_OPERATIONS, training_episodes=20000):
+    """Runs the whole suite over the sweep and returns a JSON-serialisable report."""
+    results = bench_agent(seed, operations)
+    for grid_size in grid_sizes:
+        for bombs in num_bombs:
+            results += bench_environment(grid_size, bombs, seed, operations)
+            for batch_size in batch_sizes:
+                results += bench_batched(grid_size, bombs, batch_size, seed, operations)
+            if training_episodes:
+                results.append(bench_training(grid_size, bombs, seed, training_episodes))
+                results.append(bench_rollout(grid_size, bombs, seed, training_episodes))
+    return {"metadata": get_metadata(), "results": results}
+
+
+def result_key(result):
+    return result["name"], json.dumps(result["params"], sort_keys=True)
+
+
+def compare(report, baseline):
+    """Prints the throughput of each benchmark relative to a previous report."""
+    previous = {result_key(result): result for result in baseline["results"]}
+    for result in report["results"]:
+        old = previous.get(result_key(result))
+        if old is not None:
+            ratio = result["items_per_sec"] / old["items_per_sec"]
+            print(f"{result['name']:<22} {json.dumps(result['params']):<55} {ratio:6.2f}x")
+
+
+def print_report(report):
+    for result in report["results"]:
+        print(f"{result['name']:<22} {json.dumps(result['params']):<55} {result['items_per_sec']:12.0f}/s  "
+              f"p50 {result['p50_us']:8.2f}us  p99 {result['p99_us']:8.2f}us  "
+              f"peak {result['peak_memory_bytes'] / 1024:8.0f}KiB")
+
+
+def parse_list(text):
+    return tuple(int(value) for value in text.split(","))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Kebab Hunter performance benchmarks")
+    parser.add_argument("--grid-sizes", type=parse_list, default=(3,))
+    parser.add_argument("--num-bombs", type=parse_list, default=(2,))
+    parser.add_argument("--batch-sizes", type=parse_list, default=(1, 64, 1024))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--operations", type=int, default=DEFAULT_OPERATIONS)
+    parser.add_argument("--training-episodes", type=int, default=20000)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", help="previous JSON report to compare throughput against")
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.grid_sizes, args.num_bombs, args.batch_sizes, args.seed,
+                            args.operations, args.training_episodes)
+    print_report(report)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results saved to '{args.output}'.")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
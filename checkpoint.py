@@ -0,0 +1,101 @@
+import numpy as np
+import struct
+import json
+import os
+
+# File layout: MAGIC, uint32 version, uint32 header length, JSON header, padding, Q-values, visited flags.
+# Both arrays start on ALIGNMENT-byte boundaries so they can be memory-mapped in place.
+MAGIC = b"KEBABQT\0"
+CHECKPOINT_VERSION = 1
+ALIGNMENT = 64
+PREAMBLE = struct.Struct("<8sII")
+
+# Description of the Q-table rows, see q_learning.encode_states
+STATE_ENCODING = "kebab_direction4_danger4_mixed_radix"
+
+
+def align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def is_checkpoint(filepath):
+    """True when the file starts with the checkpoint magic, pickled Q-tables do not."""
+    with open(filepath, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def save_checkpoint(filepath, agent, episode=0, extra=None):
+    """
+    Atomically writes the agent's Q-table and training state: the file is written next to the target,
+    flushed to disk and renamed over it, so a crash never leaves a truncated checkpoint behind.
+    extra: JSON-serialisable training state stored in the header, e.g. generator states
+    """
+    q_table = np.ascontiguousarray(agent.q_table, dtype=np.float64)
+    visited = np.ascontiguousarray(agent.visited, dtype=np.uint8)
+    header = {
+        "state_encoding": STATE_ENCODING,
+        "num_states": q_table.shape[0],
+        "action_size": q_table.shape[1],
+        "dtype": "float64",
+        "hyperparameters": {
+            "learning_rate": agent.learning_rate,
+            "discount_factor": agent.discount_factor,
+            "exploration_decay": agent.exploration_decay,
+            "min_exploration_rate": agent.min_exploration_rate,
+        },
+        "exploration_rate": agent.exploration_rate,
+        "episode": episode,
+        "extra": extra or {},
+    }
+    # The offsets depend on the header length, which depends on the offsets: reserve room for them first
+    header["data_offset"] = header["visited_offset"] = 0
+    header_size = len(json.dumps(header).encode()) + 64
+    header["data_offset"] = align(PREAMBLE.size + header_size)
+    header["visited_offset"] = align(header["data_offset"] + q_table.nbytes)
+    header_bytes = json.dumps(header).encode().ljust(header_size)
+
+    temp_path = f"{filepath}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(PREAMBLE.pack(MAGIC, CHECKPOINT_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        f.write(b"\0" * (header["data_offset"] - f.tell()))
+        f.write(q_table.tobytes())
+        f.write(b"\0" * (header["visited_offset"] - f.tell()))
+        f.write(visited.tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, filepath)
+
+
+def read_header(filepath):
+    """Returns the JSON header of a checkpoint."""
+    with open(filepath, "rb") as f:
+        magic, version, header_length = PREAMBLE.unpack(f.read(PREAMBLE.size))
+        if magic != MAGIC:
+            raise ValueError(f"'{filepath}' is not a Kebab Hunter checkpoint.")
+        if version > CHECKPOINT_VERSION:
+            raise ValueError(f"Checkpoint version {version} is newer than the supported version {CHECKPOINT_VERSION}.")
+        header = json.loads(f.read(header_length))
+    header["version"] = version
+    return header
+
+
+def load_checkpoint(filepath, mmap=False):
+    """
+    Returns (header, q_table, visited).
+    With mmap=True the arrays are read-only np.memmap views of the file, nothing is copied.
+    """
+    header = read_header(filepath)
+    if header["state_encoding"] != STATE_ENCODING:
+        raise ValueError(f"Unsupported state encoding '{header['state_encoding']}'.")
+    shape = (header["num_states"], header["action_size"])
+    if mmap:
+        q_table = np.memmap(filepath, dtype=header["dtype"], mode="r", offset=header["data_offset"], shape=shape)
+        visited = np.memmap(filepath, dtype=np.bool_, mode="r", offset=header["visited_offset"], shape=shape)
+    else:
+        with open(filepath, "rb") as f:
+            f.seek(header["data_offset"])
+            q_table = np.fromfile(f, dtype=header["dtype"], count=shape[0] * shape[1]).reshape(shape)
+            f.seek(header["visited_offset"])
+            visited = np.fromfile(f, dtype=np.bool_, count=shape[0] * shape[1]).reshape(shape)
+    return header, q_table, visited
@@ -0,0 +1,320 @@
+from setting import *
+from environment import GRID_CHANNELS
+from vector_env import VectorKebabHunterEnv
+from metrics import MetricsLogger
+from seeding import make_rng, spawn_seeds, BlockRandom
+from train import get_unique_run_dir
+import numpy as np
+import torch
+from torch import nn
+import argparse
+import time
+import os
+
+
+class ReplayBuffer:
+    """Fixed-capacity ring buffer of transitions in preallocated arrays, grid observations are kept as uint8."""
+
+    def __init__(self, capacity, observation_shape, rng):
+        self.capacity = capacity
+        self.rng = rng
+        self.observations = np.zeros((capacity,) + tuple(observation_shape), dtype=np.uint8)
+        self.next_observations = np.zeros((capacity,) + tuple(observation_shape), dtype=np.uint8)
+        self.actions = np.zeros(capacity, dtype=np.int64)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.dones = np.zeros(capacity, dtype=np.float32)
+        self.index = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def add(self, observation, action, reward, next_observation, done):
+        i = self.index
+        self.observations[i] = observation
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.next_observations[i] = next_observation
+        self.dones[i] = done
+        self.index = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def add_batch(self, observations, actions, rewards, next_observations, dones):
+        """Stores one transition per row, e.g. a step of a vector environment, overwriting the oldest ones."""
+        indices = (self.index + np.arange(len(actions))) % self.capacity
+        self.observations[indices] = observations
+        self.actions[indices] = actions
+        self.rewards[indices] = rewards
+        self.next_observations[indices] = next_observations
+        self.dones[indices] = dones
+        self.index = (self.index + len(actions)) % self.capacity
+        self.size = min(self.size + len(actions), self.capacity)
+
+    def sample(self, batch_size):
+        """Uniform minibatch as CPU tensors: observations, actions, rewards, next_observations, dones."""
+        indices = self.rng.integers(0, self.size, batch_size)
+        return (
+            torch.from_numpy(self.observations[indices]).float(),
+            torch.from_numpy(self.actions[indices]),
+            torch.from_numpy(self.rewards[indices]),
+            torch.from_numpy(self.next_observations[indices]).float(),
+            torch.from_numpy(self.dones[indices]),
+        )
+
+
+class QNetwork(nn.Module):
+    """Two 3x3 convolutions over the robot, kebab and bomb planes, then a fully connected head."""
+
+    def __init__(self, grid_size, action_size, channels=32, hidden=128):
+        super().__init__()
+        self.features = nn.Sequential(
+            nn.Conv2d(GRID_CHANNELS, channels, 3, padding=1), nn.ReLU(),
+            nn.Conv2d(channels, channels, 3, padding=1), nn.ReLU(),
+            nn.Flatten(),
+        )
+        self.head = nn.Sequential(
+            nn.Linear(channels * grid_size * grid_size, hidden), nn.ReLU(),
+            nn.Linear(hidden, action_size),
+        )
+
+    def forward(self, observations):
+        return self.head(self.features(observations))
+
+
+def make_profiler(log_dir, wait=1, warmup=1, active=5, repeat=1):
+    """
+    torch.profiler over DQNAgent.learn calls, assign it to agent.profiler and start() it.
+    Traces are written to log_dir for TensorBoard's profiler plugin (torch-tb-profiler).
+    """
+    return torch.profiler.profile(
+        activities=[torch.profiler.ProfilerActivity.CPU],
+        schedule=torch.profiler.schedule(wait=wait, warmup=warmup, active=active, repeat=repeat),
+        on_trace_ready=torch.profiler.tensorboard_trace_handler(log_dir),
+        record_shapes=True,
+        profile_memory=True,
+    )
+
+
+class DQNAgent:
+    """
+    Deep Q-Network on full-grid observations (get_grid_observation), CPU only.
+    Transitions go to a replay buffer; every train_every stored transitions one minibatch of batch_size is
+    learned against a target network that is synchronised every target_update_every updates.
+    num_threads: intra-op threads for torch, None keeps torch's default
+    """
+
+    def __init__(self, grid_size=3, action_size=4, learning_rate=1e-3, discount_factor=0.95, exploration_rate=1.0,
+                 exploration_decay=0.99, min_exploration_rate=0.01, buffer_size=100000, batch_size=256,
+                 learning_starts=1000, train_every=4, target_update_every=500, channels=32, hidden=128,
+                 num_threads=None, seed=None):
+        self.grid_size = grid_size
+        self.action_size = action_size
+        self.learning_rate = learning_rate
+        self.discount_factor = discount_factor
+        self.exploration_rate = exploration_rate
+        self.exploration_decay = exploration_decay
+        self.min_exploration_rate = min_exploration_rate
+        self.batch_size = batch_size
+        self.learning_starts = learning_starts
+        self.train_every = train_every
+        self.target_update_every = target_update_every
+        self.network_params = {"channels": channels, "hidden": hidden}
+        if num_threads:
+            torch.set_num_threads(num_threads)
+
+        self.rng = make_rng(seed)
+        self.random = BlockRandom(self.rng)  # Epsilon-greedy draws of choose_action
+        if seed is not None:
+            torch.manual_seed(int(self.rng.integers(2 ** 63)))
+        self.online = QNetwork(grid_size, action_size, channels, hidden)
+        self.target = QNetwork(grid_size, action_size, channels, hidden)
+        self.target.load_state_dict(self.online.state_dict())
+        self.target.requires_grad_(False)
+        self.optimizer = torch.optim.Adam(self.online.parameters(), lr=learning_rate)
+        self.buffer = ReplayBuffer(buffer_size, (GRID_CHANNELS, grid_size, grid_size), self.rng)
+        self.steps = 0  # Transitions stored
+        self.num_updates = 0
+        self.profiler = None  # Optional torch.profiler.profile, stepped after every update
+
+    def q_values(self, observations):
+        """Online network Q-values of a batch of grid observations, as an (N, action_size) array."""
+        with torch.no_grad():
+            return self.online(torch.as_tensor(np.asarray(observations), dtype=torch.float32)).numpy()
+
+    def choose_action(self, observation):
+        """Epsilon-greedy action for one (GRID_CHANNELS, grid_size, grid_size) observation."""
+        if self.random.random() < self.exploration_rate:
+            return self.random.randrange(self.action_size)
+        return int(self.q_values(observation[None]).argmax())
+
+    def choose_actions(self, observations):
+        """Epsilon-greedy actions for a batch of observations with a single forward pass."""
+        greedy = self.q_values(observations).argmax(axis=1)
+        explore = self.rng.random(len(greedy)) < self.exploration_rate
+        return np.where(explore, self.rng.integers(0, self.action_size, len(greedy)), greedy)
+
+    def update(self, observation, action, reward, next_observation, done):
+        """Stores one transition and learns when due. Returns: the loss of the update, or None"""
+        self.buffer.add(observation, action, reward, next_observation, done)
+        self.steps += 1
+        if self.steps % self.train_every == 0 and len(self.buffer) >= self.learning_starts:
+            return self.learn()
+        return None
+
+    def update_batch(self, observations, actions, rewards, next_observations, dones):
+        """
+        Stores one transition per environment and runs the updates that fell due, so the number of updates
+        per transition is the same as with update(). Returns: the mean loss, or None without an update
+        """
+        previous_steps = self.steps
+        self.buffer.add_batch(observations, actions, rewards, next_observations, dones)
+        self.steps += len(actions)
+        if len(self.buffer) < self.learning_starts:
+            return None
+        losses = [self.learn() for _ in range(self.steps // self.train_every - previous_steps // self.train_every)]
+        return float(np.mean(losses)) if losses else None
+
+    def learn(self):
+        """One minibatch update of the online network, Huber loss against the target network."""
+        with torch.profiler.record_function("dqn_learn"):
+            observations, actions, rewards, next_observations, dones = self.buffer.sample(self.batch_size)
+            q_values = self.online(observations).gather(1, actions[:, None]).squeeze(1)
+            with torch.no_grad():
+                next_q_values = self.target(next_observations).max(dim=1).values
+                targets = rewards + self.discount_factor * (1.0 - dones) * next_q_values
+            loss = nn.functional.smooth_l1_loss(q_values, targets)
+
+            self.optimizer.zero_grad(set_to_none=True)
+            loss.backward()
+            self.optimizer.step()
+
+        self.num_updates += 1
+        if self.num_updates % self.target_update_every == 0:
+            self.target.load_state_dict(self.online.state_dict())
+        if self.profiler is not None:
+            self.profiler.step()
+        return loss.item()
+
+    def decay_exploration(self):
+        self.exploration_rate = max(self.min_exploration_rate, self.exploration_rate * self.exploration_decay)
+
+    def save(self, filepath):
+        """Writes the networks, optimiser and hyperparameters atomically, like the tabular checkpoints."""
+        temp_path = f"{filepath}.tmp"
+        torch.save({
+            "grid_size": self.grid_size,
+            "action_size": self.action_size,
+            "network": self.network_params,
+            "hyperparameters": {
+                "learning_rate": self.learning_rate,
+                "discount_factor": self.discount_factor,
+                "exploration_decay": self.exploration_decay,
+                "min_exploration_rate": self.min_exploration_rate,
+            },
+            "exploration_rate": self.exploration_rate,
+            "num_updates": self.num_updates,
+            "online": self.online.state_dict(),
+            "target": self.target.state_dict(),
+            "optimizer": self.optimizer.state_dict(),
+        }, temp_path)
+        os.replace(temp_path, filepath)
+
+    def load(self, filepath):
+        """Restores a file written by save(), the network shapes must match this agent's."""
+        checkpoint = torch.load(filepath, weights_only=True)
+        if checkpoint["grid_size"] != self.grid_size or checkpoint["network"] != self.network_params:
+            raise ValueError(f"'{filepath}' holds a network for a {checkpoint['grid_size']}x{checkpoint['grid_size']} "
+                             f"grid with {checkpoint['network']}, not {self.grid_size}x{self.grid_size} with {self.network_params}.")
+        self.online.load_state_dict(checkpoint["online"])
+        self.target.load_state_dict(checkpoint["target"])
+        self.optimizer.load_state_dict(checkpoint["optimizer"])
+        self.exploration_rate = checkpoint["exploration_rate"]
+        self.num_updates = checkpoint["num_updates"]
+
+
+def train_dqn(episodes=20000, num_envs=64, max_steps=100, grid_size=3, num_bombs=2, num_kebabs=1, seed=None,
+              logging="async", log_every=100, save_dir=SAVE_DIR, num_threads=None, profile=False, **agent_kwargs):
+    """
+    Trains a DQNAgent on a vector environment: one batched forward pass picks the actions of every board,
+    and the transitions of a step are stored together. Exploration decays once per finished episode,
+    like train_agent. profile=True writes torch profiler traces of the first updates to runN/logs/profiler.
+    Returns: the agent and its MetricsLogger
+    """
+    os.makedirs(save_dir, exist_ok=True)
+    run_dir = get_unique_run_dir(save_dir)
+    log_dir = os.path.join(run_dir, "logs")
+    model_dir = os.path.join(run_dir, "model")
+    os.makedirs(log_dir, exist_ok=True)
+    os.makedirs(model_dir, exist_ok=True)
+
+    env_seed, agent_seed = spawn_seeds(seed, 2)
+    env = VectorKebabHunterEnv(num_envs, grid_size=grid_size, seed=env_seed, num_bombs=num_bombs, num_kebabs=num_kebabs)
+    agent = DQNAgent(grid_size, num_threads=num_threads, seed=agent_seed if seed is not None else None, **agent_kwargs)
+    metrics = MetricsLogger(log_dir=log_dir, mode=logging, log_every=1)
+    if profile:
+        agent.profiler = make_profiler(os.path.join(log_dir, "profiler"))
+        agent.profiler.start()
+
+    episode_steps = np.zeros(num_envs, dtype=np.int64)
+    returns = np.zeros(num_envs)
+    completed = 0
+    loss = None
+    start = time.perf_counter()
+    observations = env.get_grid_observations()
+    while completed < episodes:
+        actions = agent.choose_actions(observations)
+        _, rewards, dones = env.step(actions)
+        episode_steps += 1
+        returns += rewards
+        # Finished boards already hold their next layout, their next observation is masked by done
+        next_observations = env.get_grid_observations()
+        step_loss = agent.update_batch(observations, actions, rewards, next_observations, dones)
+        loss = step_loss if step_loss is not None else loss
+
+        ended = dones | (episode_steps >= max_steps)
+        timed_out = ended & ~dones
+        if timed_out.any():
+            env.reset_boards(np.flatnonzero(timed_out))
+            next_observations = env.get_grid_observations()
+        for total_reward in returns[ended].tolist():
+            agent.decay_exploration()
+            metrics.record_episode(total_reward)
+            completed += 1
+            if completed % log_every == 0:
+                average = metrics.average_reward()
+                metrics.log_scalars(completed, {"Average Reward (last 100)": average,
+                                                "Exploration Rate": agent.exploration_rate,
+                                                "Loss": loss if loss is not None else 0.0})
+                print(f"Episode {completed}/{episodes}, Average Reward: {average:.2f}, "
+                      f"Exploration Rate: {agent.exploration_rate:.4f}, Loss: {loss if loss is not None else float('nan'):.4f}")
+        episode_steps[ended] = 0
+        returns[ended] = 0.0
+        observations = next_observations
+
+    if agent.profiler is not None:
+        agent.profiler.stop()
+        agent.profiler = None
+    model_path = os.path.join(model_dir, "dqn.pt")
+    agent.save(model_path)
+    print(f"Training completed in {time.perf_counter() - start:.1f}s with {agent.num_updates} updates. "
+          f"Model saved to '{model_path}'.")
+    metrics.close()
+    return agent, metrics
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train a DQN agent on CPU")
+    parser.add_argument("--episodes", type=int, default=20000)
+    parser.add_argument("--num-envs", type=int, default=64)
+    parser.add_argument("--grid-size", type=int, default=3)
+    parser.add_argument("--num-bombs", type=int, default=2)
+    parser.add_argument("--num-kebabs", type=int, default=1)
+    parser.add_argument("--threads", type=int, help="torch intra-op threads")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--logging", choices=("async", "sync", "none"), default="async")
+    parser.add_argument("--profile", action="store_true", help="write torch profiler traces for TensorBoard")
+    args = parser.parse_args()
+
+    train_dqn(args.episodes, args.num_envs, grid_size=args.grid_size, num_bombs=args.num_bombs,
+              num_kebabs=args.num_kebabs, seed=args.seed, logging=args.logging, num_threads=args.threads,
+              profile=args.profile)
@@ -1,31 +1,111 @@
 from setting import *
+from layouts import LayoutSampler
+from seeding import make_rng, BlockRandom
 import numpy as np
-import random
-import pygame
+
+# Contents of an occupancy grid cell
+EMPTY, BOMB, KEBAB = 0, 1, 2
+# Planes of the grid observation: robot, kebabs, bombs
+GRID_CHANNELS = 3
+# Upper bound on the cells held by an environment's feature cache, boards with more layouts skip the tables
+FEATURE_CACHE_CELLS = 1 << 18
+
+# Cell feature caches shared by every environment of this process, keyed by (class, grid_size, reward values)
+_feature_caches = {}
+
+DEFAULT_REWARDS = {
+    "step": -0.1,  # Reduced step penalty
+    "wall_penalty": -0.5,  # Reduced wall penalty
+    "kebab_reward": 1.0,  # Normalized kebab reward
+    "bomb_penalty": -1.0,  # Normalized bomb penalty
+    "direction_bonus": 0.25,  # Reduced direction bonus
+    "wrong_direction_penalty": -0.2  # Reduced wrong direction penalty
+}
 
 class KebabHunterEnvironment:
-    def __init__(self, grid_size=3, cell_size=100, image_dir=IMAGE_DIR):  # Changed grid_size to 4
+    render_modes = ["human", "rgb_array"]
+
+    def __init__(self, grid_size=3, cell_size=100, image_dir=IMAGE_DIR, render_mode=None, seed=None, num_bombs=2, num_kebabs=1, rewards=None, feature_tables=None):  # Changed grid_size to 4
+        if render_mode is not None and render_mode not in self.render_modes:
+            raise ValueError(f"Unknown render_mode '{render_mode}'. Expected one of {self.render_modes} or None.")
         self.grid_size = grid_size
         self.cell_size = cell_size
         self.window_size = grid_size * cell_size
-        self.num_bombs = 2  # Fixed number of bombs set to 3
+        self.num_bombs = num_bombs
+        self.num_kebabs = num_kebabs  # The episode ends once every kebab is collected
         self.image_dir = image_dir
-        self.rewards = {
-            "step": -0.1,  # Reduced step penalty
-            "wall_penalty": -0.5,  # Reduced wall penalty
-            "kebab_reward": 1.0,  # Normalized kebab reward
-            "bomb_penalty": -1.0,  # Normalized bomb penalty
-            "direction_bonus": 0.25,  # Reduced direction bonus
-            "wrong_direction_penalty": -0.2  # Reduced wrong direction penalty
+        self.render_mode = render_mode
+        self.screen = None  # Created on demand, headless environments never touch pygame
+        # Per-instance generator so layouts can be replayed, seed may be an int, SeedSequence or Generator
+        self.np_random = make_rng(seed)
+        self.random = BlockRandom(self.np_random)
+        self.layout_sampler = LayoutSampler(grid_size, num_bombs, num_kebabs)
+        # Occupancy grid, the step rules read it through the flat view `cells`
+        self.grid = np.zeros((grid_size, grid_size), dtype=np.uint8)
+        self.cells = memoryview(self.grid.reshape(-1))
+        # Wall-clamped target cell of every (cell, action) at index cell * 4 + action, and each cell's [row, col]
+        num_cells = grid_size * grid_size
+        self.cell_positions = [list(divmod(cell, grid_size)) for cell in range(num_cells)]
+        self.cell_moves = [
+            (min(max(row + d_row, 0), grid_size - 1)) * grid_size + min(max(col + d_col, 0), grid_size - 1)
+            for row, col in self.cell_positions for d_row, d_col in ((-1, 0), (1, 0), (0, -1), (0, 1))
+        ]
+        # Overrides of DEFAULT_REWARDS, e.g. from a hyperparameter sweep
+        unknown = set(rewards or {}) - set(DEFAULT_REWARDS)
+        if unknown:
+            raise ValueError(f"Unknown reward names {sorted(unknown)}. Expected some of {list(DEFAULT_REWARDS)}.")
+        self.rewards = {**DEFAULT_REWARDS, **(rewards or {})}
+        self.feature_rewards = {
+            "step": self.calculate_step_reward(),
+            "wall_penalty": self.calculate_wall_penalty(),
+            "kebab_reward": self.calculate_kebab_reward(),
+            "bomb_penalty": self.calculate_bomb_penalty(),
+            "direction_bonus": self.calculate_direction_bonus(),
+            "wrong_direction_penalty": self.calculate_wrong_direction_penalty(),
         }
+        # Per-layout lookup tables from build_cell_features, keyed by (kebab cells, bomb cells) and shared
+        # with every environment of the same class, size and rewards
+        self.feature_cache = _feature_caches.setdefault(
+            (type(self), grid_size, tuple(self.feature_rewards.items())), {})
+        self.feature_cache_size = max(1, FEATURE_CACHE_CELLS // (grid_size * grid_size))
+        # Tables only pay off when layouts repeat: by default they are used when every valid layout fits in the
+        # cache, larger boards evaluate the rules on the occupancy grid each step. False also suits environments
+        # that only draw layouts, True forces the tables.
+        if feature_tables is None:
+            table = self.layout_sampler.table
+            feature_tables = table is not None and len(table) <= self.feature_cache_size
+        self.feature_tables = feature_tables
+        self.cell_states = self.cell_deadlock = self.cell_step_rewards = None
         self.reset()
 
-        # Initialize pygame
-        pygame.init()
-        self.screen = pygame.display.set_mode((self.window_size, self.window_size))
-        pygame.display.set_caption("Kebab Hunter")
+        # A window is only opened eagerly when the caller asked to watch the game
+        if self.render_mode == "human":
+            self.init_renderer()
+
+    def init_renderer(self):
+        """Imports pygame, creates the drawing surface and loads the sprites."""
+        if self.screen is not None:
+            return
+        import pygame
+
+        if self.render_mode == "human":
+            pygame.init()
+            self.screen = pygame.display.set_mode((self.window_size, self.window_size))
+            pygame.display.set_caption("Kebab Hunter")
+        else:
+            # Offscreen surface, no display or SDL video driver required
+            self.screen = pygame.Surface((self.window_size, self.window_size))
+
+        # Static layer: background and grid lines are drawn once, frames only restore the cells that changed
+        self.background = pygame.Surface((self.window_size, self.window_size))
+        self.background.fill((255, 255, 255))  # White background
+        for x in range(0, self.window_size, self.cell_size):
+            pygame.draw.line(self.background, (200, 200, 200), (x, 0), (x, self.window_size))
+            pygame.draw.line(self.background, (200, 200, 200), (0, x), (self.window_size, x))
+        self.drawn_sprites = None  # Cell -> sprites on screen, None forces a full redraw
 
         # Load images
+        cell_size = self.cell_size
         self.robot_image = pygame.image.load(f"{self.image_dir}/robot.png")
         self.robot_image = pygame.transform.scale(self.robot_image, (cell_size, cell_size))
         self.kebab_image = pygame.image.load(f"{self.image_dir}/kebab.png")
@@ -33,85 +113,116 @@ class KebabHunterEnvironment:
         self.bomb_image = pygame.image.load(f"{self.image_dir}/bomb.png")
         self.bomb_image = pygame.transform.scale(self.bomb_image, (cell_size, cell_size))
 
-    def is_kebab_reachable(self):
-        """Checks if the kebab is reachable from the robot's position."""
-        visited = set()
-        stack = [tuple(self.robot_position)]
-
-        while stack:
-            current = stack.pop()
-            if current == tuple(self.kebab_position):
-                return True  # Kebab is reachable
-            if current in visited:
-                continue
-            visited.add(current)
-
-            # Add valid neighbors to the stack
-            for action in range(4):  # Actions: 0 = up, 1 = down, 2 = left, 3 = right
-                neighbor = self.get_new_position(action)
-                if self.is_valid_position(neighbor) and tuple(neighbor) not in visited:
-                    stack.append(tuple(neighbor))
-
-        return False  # No path to the kebab
-
     def reset(self):
-        """Resets the environment to the initial state."""
-        while True:
-            self.robot_position = [random.randint(0, self.grid_size - 1), random.randint(0, self.grid_size - 1)]
-            self.kebab_position = [random.randint(0, self.grid_size - 1), random.randint(0, self.grid_size - 1)]
-            while self.kebab_position == self.robot_position:
-                self.kebab_position = [random.randint(0, self.grid_size - 1), random.randint(0, self.grid_size - 1)]
-            self.bomb_positions = []
-            for _ in range(self.num_bombs):
-                bomb_position = [random.randint(0, self.grid_size - 1), random.randint(0, self.grid_size - 1)]
-                while bomb_position == self.robot_position or bomb_position == self.kebab_position or bomb_position in self.bomb_positions:
-                    bomb_position = [random.randint(0, self.grid_size - 1), random.randint(0, self.grid_size - 1)]
-                self.bomb_positions.append(bomb_position)
-
-            # Ensure the robot has at least one valid move and the kebab is reachable
-            if not self.is_deadlock() and self.is_kebab_reachable():
-                break
+        """Resets the environment to a uniformly drawn layout where every kebab is reachable."""
+        return self.set_layout(*self.layout_sampler.sample(self.random))
+
+    def set_layout(self, robot_cell, kebab_cells, bomb_cells):
+        """Places the robot, kebabs and bombs on the given flat cell indices and starts a new episode."""
+        self.robot_position = list(divmod(robot_cell, self.grid_size))
+        self.kebab_positions = [list(divmod(cell, self.grid_size)) for cell in kebab_cells]
+        self.bomb_positions = [list(divmod(cell, self.grid_size)) for cell in bomb_cells]
+
+        self.grid.fill(EMPTY)
+        flat_grid = self.grid.reshape(-1)
+        flat_grid[bomb_cells] = BOMB
+        flat_grid[kebab_cells] = KEBAB
+        self.bomb_cells = tuple(bomb_cells)
+        if self.feature_tables:
+            self.update_features()
 
         self.done = False
         return self.get_state()
 
+    def update_features(self):
+        """Switches to the lookup tables of the current kebabs and bombs, which stay fixed until a kebab is collected."""
+        kebab_cells = tuple(row * self.grid_size + col for row, col in self.kebab_positions)
+        key = (kebab_cells, self.bomb_cells)
+        features = self.feature_cache.get(key)
+        if features is None:
+            if len(self.feature_cache) >= self.feature_cache_size:
+                del self.feature_cache[next(iter(self.feature_cache))]  # Drop the oldest entry
+            features = self.build_cell_features()
+            self.feature_cache[key] = features
+        self.cell_states, self.cell_deadlock, self.cell_step_rewards = features
+
+    def build_cell_features(self):
+        """
+        Lookup tables of the current board, built by placing the robot on every cell in turn:
+          states: compute_state() for each cell
+          deadlock: compute_deadlock() for each cell
+          step_rewards: calculate_rewards() for arriving on a cell with an action, at index cell * 4 + action
+        """
+        robot_position = self.robot_position
+        states, deadlock, step_rewards = [], [], []
+        for position in self.cell_positions:
+            self.robot_position = position
+            states.append(self.compute_state())
+            deadlock.append(self.compute_deadlock())
+            step_rewards.extend(self.calculate_rewards(action) for action in range(4))
+        self.robot_position = robot_position
+        return states, deadlock, step_rewards
+
+    @property
+    def kebab_position(self):
+        """The first remaining kebab, the only one with num_kebabs=1. None once every kebab is collected."""
+        return self.kebab_positions[0] if self.kebab_positions else None
+
+    def nearest_kebab(self):
+        """Returns the remaining kebab closest to the robot (Manhattan distance, first one on ties) or None."""
+        if len(self.kebab_positions) <= 1:
+            return self.kebab_position
+        row, col = self.robot_position
+        return min(self.kebab_positions, key=lambda kebab: abs(kebab[0] - row) + abs(kebab[1] - col))
+
+    def get_kebab_direction(self):
+        """Direction of the nearest kebab relative to the robot: [above, below, right, left]."""
+        kebab = self.nearest_kebab()
+        if kebab is None:
+            return [0, 0, 0, 0]
+        return [
+            int(kebab[0] < self.robot_position[0]),  # Kebab is above
+            int(kebab[0] > self.robot_position[0]),  # Kebab is below
+            int(kebab[1] > self.robot_position[1]),  # Kebab is to the right
+            int(kebab[1] < self.robot_position[1])   # Kebab is to the left
+        ]
+
     def get_state(self):
-        """Returns the current state as a tuple of kebab direction and danger positions."""
+        """
+        Returns the current state as a tuple of kebab direction [above, below, right, left]
+        and danger positions [above, below, right, left] (-1 for a wall, 1 for a bomb).
+        """
+        if not self.feature_tables:
+            return self.compute_state()
+        return self.cell_states[self.robot_position[0] * self.grid_size + self.robot_position[1]]
+
+    def compute_state(self):
+        """Computes get_state() from the kebab positions and the occupancy grid."""
         # Direction of the kebab relative to the robot
-        kebab_direction = [
-            int(self.kebab_position[0] < self.robot_position[0]),  # Kebab is above
-            int(self.kebab_position[0] > self.robot_position[0]),  # Kebab is below
-            int(self.kebab_position[1] > self.robot_position[1]),  # Kebab is to the right
-            int(self.kebab_position[1] < self.robot_position[1])   # Kebab is to the left
+        kebab_direction = self.get_kebab_direction()
+
+        # Danger positions relative to the robot: -1 for a wall, 1 for a bomb, looked up in the occupancy grid
+        row, col = self.robot_position
+        last = self.grid_size - 1
+        cell = row * self.grid_size + col
+        cells = self.cells
+        danger_positions = [  # [Above, Below, Right, Left]
+            -1 if row == 0 else int(cells[cell - self.grid_size] == BOMB),
+            -1 if row == last else int(cells[cell + self.grid_size] == BOMB),
+            -1 if col == last else int(cells[cell + 1] == BOMB),
+            -1 if col == 0 else int(cells[cell - 1] == BOMB),
         ]
 
-        # Danger positions (bombs and walls) relative to the robot
-        danger_positions = [0, 0, 0, 0]  # [Above, Below, Right, Left]
-
-        # Check for walls
-        if self.robot_position[0] == 0:  # Wall above
-            danger_positions[0] = -1
-        if self.robot_position[0] == self.grid_size - 1:  # Wall below
-            danger_positions[1] = -1
-        if self.robot_position[1] == self.grid_size - 1:  # Wall to the right
-            danger_positions[2] = -1
-        if self.robot_position[1] == 0:  # Wall to the left
-            danger_positions[3] = -1
-
-        # Check for bombs
-        for bomb_position in self.bomb_positions:
-            if bomb_position[0] == self.robot_position[0] - 1 and bomb_position[1] == self.robot_position[1]:
-                danger_positions[0] = 1  # Danger above
-            if bomb_position[0] == self.robot_position[0] + 1 and bomb_position[1] == self.robot_position[1]:
-                danger_positions[1] = 1  # Danger below
-            if bomb_position[1] == self.robot_position[1] + 1 and bomb_position[0] == self.robot_position[0]:
-                danger_positions[2] = 1  # Danger to the right
-            if bomb_position[1] == self.robot_position[1] - 1 and bomb_position[0] == self.robot_position[0]:
-                danger_positions[3] = 1  # Danger to the left
-
         # Combine state components
-        state = tuple(kebab_direction + danger_positions)
-        return state
+        return tuple(kebab_direction + danger_positions)
+
+    def get_grid_observation(self):
+        """Full-board observation: (GRID_CHANNELS, grid_size, grid_size) uint8 planes of the robot, kebabs and bombs."""
+        observation = np.zeros((GRID_CHANNELS, self.grid_size, self.grid_size), dtype=np.uint8)
+        observation[0, self.robot_position[0], self.robot_position[1]] = 1
+        observation[1] = self.grid == KEBAB
+        observation[2] = self.grid == BOMB
+        return observation
 
     def calculate_step_reward(self):
         """Returns the base reward for taking a step."""
@@ -137,8 +248,8 @@ class KebabHunterEnvironment:
         """Returns the penalty for moving in the wrong direction."""
         return self.rewards["wrong_direction_penalty"]
 
-    def calculate_rewards(self, action, initial_distance):
-        """Calculate and sum all rewards for the current step."""
+    def calculate_rewards(self, action, initial_distance=None):
+        """Calculate and sum all rewards for the current step, with the robot already on its new cell."""
         reward = self.calculate_step_reward()  # Base step penalty
 
         # Wall penalty
@@ -148,21 +259,18 @@ class KebabHunterEnvironment:
            (action == 3 and self.robot_position[1] == self.grid_size - 1):
             reward += self.calculate_wall_penalty()
 
+        cell = self.cells[self.robot_position[0] * self.grid_size + self.robot_position[1]]
+
         # Kebab reward
-        if self.robot_position == self.kebab_position:
+        if cell == KEBAB:
             reward += self.calculate_kebab_reward()
 
         # Bomb penalty
-        if self.robot_position in self.bomb_positions:
+        if cell == BOMB:
             reward += self.calculate_bomb_penalty()
 
         # Direction bonus or wrong direction penalty
-        kebab_direction = [
-            int(self.kebab_position[0] < self.robot_position[0]),  # Kebab is above
-            int(self.kebab_position[0] > self.robot_position[0]),  # Kebab is below
-            int(self.kebab_position[1] > self.robot_position[1]),  # Kebab is to the right
-            int(self.kebab_position[1] < self.robot_position[1])   # Kebab is to the left
-        ]
+        kebab_direction = self.get_kebab_direction()
         if (action == 0 and kebab_direction[0]) or \
            (action == 1 and kebab_direction[1]) or \
            (action == 2 and kebab_direction[3]) or \
@@ -174,16 +282,22 @@ class KebabHunterEnvironment:
         return reward
 
     def is_deadlock(self):
-        """Checks if the robot is in a deadlock situation."""
+        """Checks if the robot is in a deadlock situation: no move leads to a free cell inside the grid."""
+        if not self.feature_tables:
+            return self.compute_deadlock()
+        return self.cell_deadlock[self.robot_position[0] * self.grid_size + self.robot_position[1]]
+
+    def compute_deadlock(self):
+        """Computes is_deadlock() from the occupancy grid."""
         for action in range(4):  # Actions: 0 = up, 1 = down, 2 = left, 3 = right
             new_position = self.get_new_position(action)
             if self.is_valid_position(new_position):
                 return False  # At least one valid move exists
         return True  # No valid moves available
 
-    def get_new_position(self, action):
-        """Returns the new position based on the action."""
-        new_position = self.robot_position[:]
+    def get_new_position(self, action, position=None):
+        """Returns the new position based on the action, starting from the robot unless a position is given."""
+        new_position = (self.robot_position if position is None else position)[:]
         if action == 0:  # Up
             new_position[0] -= 1
         elif action == 1:  # Down
@@ -199,10 +313,17 @@ class KebabHunterEnvironment:
         if position[0] < 0 or position[0] >= self.grid_size or \
            position[1] < 0 or position[1] >= self.grid_size:
             return False  # Out of bounds
-        if position in self.bomb_positions:
+        if self.cells[position[0] * self.grid_size + position[1]] == BOMB:
             return False  # Bomb position
         return True
 
+    def collect_kebab(self):
+        """Removes the kebab under the robot from the board."""
+        self.kebab_positions.remove(self.robot_position)
+        self.cells[self.robot_position[0] * self.grid_size + self.robot_position[1]] = EMPTY
+        if self.feature_tables:
+            self.update_features()  # The kebab direction now points at the next nearest kebab
+
     def step(self, action):
         """
         Takes an action and updates the environment.
@@ -212,58 +333,83 @@ class KebabHunterEnvironment:
         if self.done:
             raise ValueError("Episode has ended. Please reset the environment.")
 
-        # Calculate initial distance to the kebab
-        initial_distance = abs(self.robot_position[0] - self.kebab_position[0]) + abs(self.robot_position[1] - self.kebab_position[1])
+        # Move the robot, walls block the move
+        position = self.robot_position
+        cell = self.cell_moves[(position[0] * self.grid_size + position[1]) * 4 + action]
+        position[0], position[1] = self.cell_positions[cell]
 
-        # Move the robot
-        if action == 0 and self.robot_position[0] > 0:  # Up
-            self.robot_position[0] -= 1
-        elif action == 1 and self.robot_position[0] < self.grid_size - 1:  # Down
-            self.robot_position[0] += 1
-        elif action == 2 and self.robot_position[1] > 0:  # Left
-            self.robot_position[1] -= 1
-        elif action == 3 and self.robot_position[1] < self.grid_size - 1:  # Right
-            self.robot_position[1] += 1
+        tables = self.feature_tables
 
         # Check for deadlock
-        if self.is_deadlock():
+        if self.cell_deadlock[cell] if tables else self.compute_deadlock():
             self.reset()  # Reconfigure the environment
             return self.get_state(), 0, False  # Return neutral reward and not done
 
-        # Calculate rewards
-        reward = self.calculate_rewards(action, initial_distance)
+        # Rewards of arriving on this cell with this action
+        reward = self.cell_step_rewards[cell * 4 + action] if tables else self.calculate_rewards(action)
 
-        # Check if the episode is done
-        if self.robot_position == self.kebab_position or self.robot_position in self.bomb_positions:
+        # Check if the episode is done: a bomb, or the last kebab
+        occupant = self.cells[cell]
+        if occupant == KEBAB:
+            self.collect_kebab()
+            self.done = not self.kebab_positions
+        elif occupant == BOMB:
             self.done = True
 
-        return self.get_state(), reward, self.done
+        return self.cell_states[cell] if tables else self.compute_state(), reward, self.done
 
     def render(self):
-        """Renders the grid with the robot, kebab, and bomb positions using pygame."""
-        self.screen.fill((255, 255, 255))  # White background
-
-        # Draw grid
-        for x in range(0, self.window_size, self.cell_size):
-            pygame.draw.line(self.screen, (200, 200, 200), (x, 0), (x, self.window_size))
-            pygame.draw.line(self.screen, (200, 200, 200), (0, x), (self.window_size, x))
-
-        # Draw robot
-        robot_x, robot_y = self.robot_position[1] * self.cell_size, self.robot_position[0] * self.cell_size
-        self.screen.blit(self.robot_image, (robot_x, robot_y))
-
-        # Draw kebab
-        kebab_x, kebab_y = self.kebab_position[1] * self.cell_size, self.kebab_position[0] * self.cell_size
-        self.screen.blit(self.kebab_image, (kebab_x, kebab_y))
-
-        # Draw bombs
-        for bomb_position in self.bomb_positions:
-            bomb_x, bomb_y = bomb_position[1] * self.cell_size, bomb_position[0] * self.cell_size
-            self.screen.blit(self.bomb_image, (bomb_x, bomb_y))
-
-        # Update display
-        pygame.display.flip()
+        """
+        Renders the grid with the robot, kebab, and bomb positions using pygame.
+        Returns: an (H, W, 3) uint8 array in "rgb_array" mode, None in "human" mode
+        """
+        if self.render_mode is None:
+            raise ValueError("Environment was created with render_mode=None. Use 'human' or 'rgb_array' to render.")
+        import pygame
+
+        self.init_renderer()
+
+        # Sprites of every occupied cell in drawing order: robot, then kebabs, then bombs on top
+        sprites = {}
+        for position, image in [(self.robot_position, self.robot_image)] + \
+                               [(kebab, self.kebab_image) for kebab in self.kebab_positions] + \
+                               [(bomb, self.bomb_image) for bomb in self.bomb_positions]:
+            cell = (position[0], position[1])
+            sprites[cell] = sprites.get(cell, ()) + (image,)
+
+        # Only cells whose sprites changed since the last frame are restored from the background and redrawn
+        if self.drawn_sprites is None:
+            self.screen.blit(self.background, (0, 0))
+            changed = sprites.keys()
+        else:
+            changed = [cell for cell in sprites.keys() | self.drawn_sprites.keys()
+                       if sprites.get(cell) != self.drawn_sprites.get(cell)]
+        dirty_rects = []
+        for row, col in changed:
+            rect = pygame.Rect(col * self.cell_size, row * self.cell_size, self.cell_size, self.cell_size)
+            self.screen.blit(self.background, rect, rect)
+            for image in sprites.get((row, col), ()):
+                self.screen.blit(image, rect)
+            dirty_rects.append(rect)
+        full_redraw = self.drawn_sprites is None
+        self.drawn_sprites = sprites
+
+        if self.render_mode == "rgb_array":
+            # surfarray is indexed (x, y), frames are expected as (row, column)
+            return np.transpose(pygame.surfarray.array3d(self.screen), (1, 0, 2))
+
+        # Update display, after the first frame only the changed cells are pushed
+        if full_redraw:
+            pygame.display.flip()
+        elif dirty_rects:
+            pygame.display.update(dirty_rects)
 
     def close(self):
         """Closes the pygame window."""
-        pygame.quit()
+        if self.screen is None:
+            return
+        import pygame
+
+        if self.render_mode == "human":
+            pygame.quit()
+        self.screen = None
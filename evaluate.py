@@ -0,0 +1,80 @@
+from vector_env import VectorKebabHunterEnv
+from policy import GreedyPolicy
+import numpy as np
+import argparse
+import time
+
+
+def evaluate(policy, episodes=10000, num_envs=1024, grid_size=3, num_bombs=2, num_kebabs=1, max_steps=100, seed=0):
+    """
+    Runs `episodes` headless episodes of a policy on a vector environment and returns success rate,
+    bomb-hit rate, timeout rate, mean steps to the kebab and mean return.
+    Every board plays the same number of episodes, so short episodes are not over-represented.
+    """
+    num_envs = min(num_envs, episodes)
+    quota = np.full(num_envs, episodes // num_envs)
+    quota[:episodes % num_envs] += 1
+    env = VectorKebabHunterEnv(num_envs, grid_size=grid_size, seed=seed, num_bombs=num_bombs, num_kebabs=num_kebabs)
+
+    finished = np.zeros(num_envs, dtype=np.int64)
+    steps = np.zeros(num_envs, dtype=np.int64)
+    returns = np.zeros(num_envs)
+    successes = bomb_hits = timeouts = 0
+    success_steps = []
+    episode_returns = []
+
+    start = time.perf_counter()
+    states = env.get_states()
+    while (finished < quota).any():
+        _, rewards, dones = env.step(policy.act_batch(states))
+        steps += 1
+        returns += rewards
+        timed_out = ~dones & (steps >= max_steps)
+        if timed_out.any():
+            env.reset_boards(np.flatnonzero(timed_out))
+
+        # Only episodes within each board's quota are counted
+        ended = (dones | timed_out) & (finished < quota)
+        if ended.any():
+            hit_bomb = ended & env.info["hit_bomb"]
+            success = ended & dones & ~env.info["hit_bomb"]
+            successes += int(success.sum())
+            bomb_hits += int(hit_bomb.sum())
+            timeouts += int((ended & timed_out).sum())
+            success_steps.extend(steps[success].tolist())
+            episode_returns.extend(returns[ended].tolist())
+            finished += ended
+        steps[dones | timed_out] = 0
+        returns[dones | timed_out] = 0.0
+        states = env.get_states()
+
+    total = int(finished.sum())
+    return {
+        "episodes": total,
+        "success_rate": successes / total,
+        "bomb_hit_rate": bomb_hits / total,
+        "timeout_rate": timeouts / total,
+        "mean_steps_to_kebab": float(np.mean(success_steps)) if success_steps else float("nan"),
+        "mean_return": float(np.mean(episode_returns)),
+        "seconds": time.perf_counter() - start,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate a trained Q-table with its greedy policy")
+    parser.add_argument("q_table", help="pickled Q-table or checkpoint")
+    parser.add_argument("--episodes", type=int, default=10000)
+    parser.add_argument("--num-envs", type=int, default=1024)
+    parser.add_argument("--grid-size", type=int, default=3)
+    parser.add_argument("--num-bombs", type=int, default=2)
+    parser.add_argument("--num-kebabs", type=int, default=1)
+    parser.add_argument("--max-steps", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    results = evaluate(GreedyPolicy.from_file(args.q_table), args.episodes, args.num_envs, args.grid_size,
+                       args.num_bombs, args.num_kebabs, args.max_steps, args.seed)
+    print(f"Episodes: {results['episodes']}, Success Rate: {results['success_rate']:.3f}, "
+          f"Bomb-Hit Rate: {results['bomb_hit_rate']:.3f}, Timeout Rate: {results['timeout_rate']:.3f}, "
+          f"Mean Steps to Kebab: {results['mean_steps_to_kebab']:.2f}, Mean Return: {results['mean_return']:.3f} "
+          f"({results['seconds']:.2f}s)")
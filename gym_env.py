@@ -0,0 +1,112 @@
+from environment import KebabHunterEnvironment
+from vector_env import VectorKebabHunterEnv
+import gymnasium as gym
+from gymnasium import spaces
+from gymnasium.vector import VectorEnv, AutoresetMode
+from gymnasium.vector.utils import batch_space
+import numpy as np
+
+ENV_ID = "KebabHunter-v0"
+MAX_EPISODE_STEPS = 100
+
+
+def observation_space():
+    """The 8 state features: kebab direction bits, then danger values (-1 wall, 0 free, 1 bomb)."""
+    return spaces.Box(low=-1, high=1, shape=(8,), dtype=np.int8)
+
+
+class KebabHunterGymEnv(gym.Env):
+    """
+    Gymnasium interface to KebabHunterEnvironment.
+    terminated is True on a bomb or once every kebab is collected; truncation comes from the TimeLimit
+    wrapper that gym.make adds with max_episode_steps. reset(seed=...) replays KebabHunterEnvironment(seed=...).
+    """
+
+    metadata = {"render_modes": KebabHunterEnvironment.render_modes, "render_fps": 4}
+
+    def __init__(self, render_mode=None, grid_size=3, num_bombs=2, num_kebabs=1, rewards=None):
+        self.render_mode = render_mode
+        self.env_kwargs = {"grid_size": grid_size, "num_bombs": num_bombs, "num_kebabs": num_kebabs,
+                           "rewards": rewards, "render_mode": render_mode}
+        self.env = KebabHunterEnvironment(**self.env_kwargs)
+        self.observation_space = observation_space()
+        self.action_space = spaces.Discrete(4)  # 0 = up, 1 = down, 2 = left, 3 = right
+
+    def reset(self, seed=None, options=None):
+        super().reset(seed=seed)
+        if seed is not None:
+            self.env.close()
+            self.env = KebabHunterEnvironment(seed=seed, **self.env_kwargs)  # Draws its first layout
+            state = self.env.get_state()
+        else:
+            state = self.env.reset()
+        return np.array(state, dtype=np.int8), {}
+
+    def step(self, action):
+        state, reward, done = self.env.step(int(action))
+        return np.array(state, dtype=np.int8), float(reward), done, False, {}
+
+    def render(self):
+        return self.env.render()
+
+    def close(self):
+        self.env.close()
+
+
+class KebabHunterVectorEnv(VectorEnv):
+    """
+    Native Gymnasium vector environment backed by VectorKebabHunterEnv: one NumPy call steps every board.
+    Boards reset in the same step they finish (AutoresetMode.SAME_STEP): the returned observation is the new
+    start state and info["final_obs"] holds the last observation of the boards flagged in info["_final_obs"].
+    info also carries the per-board "hit_bomb", "collected_kebab" and "deadlock" flags.
+    """
+
+    metadata = {"autoreset_mode": AutoresetMode.SAME_STEP, "render_modes": []}
+
+    def __init__(self, num_envs, grid_size=3, num_bombs=2, num_kebabs=1, rewards=None,
+                 max_episode_steps=MAX_EPISODE_STEPS, seed=None):
+        self.num_envs = num_envs
+        self.env_kwargs = {"grid_size": grid_size, "num_bombs": num_bombs, "num_kebabs": num_kebabs, "rewards": rewards}
+        self.env = VectorKebabHunterEnv(num_envs, seed=seed, **self.env_kwargs)
+        self.max_episode_steps = max_episode_steps
+        self.episode_steps = np.zeros(num_envs, dtype=np.int64)
+
+        self.single_observation_space = observation_space()
+        self.single_action_space = spaces.Discrete(4)
+        self.observation_space = batch_space(self.single_observation_space, num_envs)
+        self.action_space = batch_space(self.single_action_space, num_envs)
+
+    def reset(self, *, seed=None, options=None):
+        """Resets every board, seed=int replays VectorKebabHunterEnv(num_envs, seed=seed)."""
+        super().reset(seed=seed)
+        if seed is not None:
+            self.env = VectorKebabHunterEnv(self.num_envs, seed=seed, **self.env_kwargs)
+            states = self.env.get_states()
+        else:
+            states = self.env.reset()
+        self.episode_steps[:] = 0
+        return states, {}
+
+    def step(self, actions):
+        final_states, rewards, terminated = self.env.step(actions)
+        self.episode_steps += 1
+        truncated = ~terminated & (self.episode_steps >= self.max_episode_steps) if self.max_episode_steps \
+            else np.zeros(self.num_envs, dtype=bool)
+        if truncated.any():
+            self.env.reset_boards(np.flatnonzero(truncated))
+
+        ended = terminated | truncated
+        self.episode_steps[ended] = 0
+        info = dict(self.env.info)
+        if ended.any():
+            info["final_obs"] = final_states
+            info["_final_obs"] = ended
+        return self.env.get_states(), rewards, terminated, truncated, info
+
+
+gym.register(
+    id=ENV_ID,
+    entry_point="gym_env:KebabHunterGymEnv",
+    vector_entry_point="gym_env:KebabHunterVectorEnv",
+    max_episode_steps=MAX_EPISODE_STEPS,
+)
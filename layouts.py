@@ -0,0 +1,150 @@
+import numpy as np
+from itertools import combinations
+from math import comb
+import os
+
+# Boards with more candidate layouts than this are sampled instead of enumerated
+MAX_ENUMERATED_LAYOUTS = 5_000_000
+# Bomb configurations whose component labels are kept by a LayoutSampler
+COMPONENT_CACHE_SIZE = 4096
+
+# Packed tables shared by every environment of this process, keyed by (grid_size, num_bombs, num_kebabs)
+_layout_tables = {}
+
+
+def cell_dtype(grid_size):
+    """Smallest unsigned dtype that can hold a flat cell index."""
+    return np.uint8 if grid_size * grid_size <= 256 else np.uint16 if grid_size * grid_size <= 65536 else np.uint32
+
+
+def label_components(grid_size, bomb_cells):
+    """Labels the 4-connected free regions of the board, bomb cells get -1."""
+    num_cells = grid_size * grid_size
+    labels = np.full(num_cells, -2, dtype=np.int32)
+    labels[list(bomb_cells)] = -1
+    flat = labels.tolist()
+
+    label = 0
+    for start in range(num_cells):
+        if flat[start] != -2:
+            continue
+        flat[start] = label
+        queue = [start]
+        for cell in queue:
+            row, col = divmod(cell, grid_size)
+            for neighbour, inside in ((cell - grid_size, row > 0), (cell + grid_size, row < grid_size - 1),
+                                      (cell - 1, col > 0), (cell + 1, col < grid_size - 1)):
+                if inside and flat[neighbour] == -2:
+                    flat[neighbour] = label
+                    queue.append(neighbour)
+        label += 1
+    return np.array(flat, dtype=np.int32)
+
+
+def count_candidate_layouts(grid_size, num_bombs, num_kebabs=1):
+    """Number of (robot, kebab set, bomb set) placements before the reachability check."""
+    num_cells = grid_size * grid_size
+    return comb(num_cells, num_bombs) * (num_cells - num_bombs) * comb(num_cells - num_bombs - 1, num_kebabs)
+
+
+def enumerate_layouts(grid_size, num_bombs, num_kebabs=1):
+    """
+    Returns every valid layout as a packed (L, 1 + num_kebabs + num_bombs) array of flat cell indices
+    [robot, kebab_1, ..., kebab_k, bomb_1, ..., bomb_n], kebabs and bombs in ascending order.
+    A layout is valid when every kebab can be reached from the robot, which also rules out deadlocks.
+    """
+    num_cells = grid_size * grid_size
+    width = 1 + num_kebabs + num_bombs
+    dtype = cell_dtype(grid_size)
+    cells = np.arange(num_cells)
+    blocks = []
+    for bomb_cells in combinations(range(num_cells), num_bombs):
+        labels = label_components(grid_size, bomb_cells)
+        free = cells[labels >= 0]
+        free_labels = labels[free]
+        if num_kebabs == 1:
+            # Every ordered pair of distinct free cells inside the same component
+            same_component = (free_labels[:, None] == free_labels[None, :]) & ~np.eye(len(free), dtype=bool)
+            robot_index, kebab_index = np.nonzero(same_component)
+            block = np.empty((len(robot_index), width), dtype=dtype)
+            block[:, 0] = free[robot_index]
+            block[:, 1] = free[kebab_index]
+        else:
+            rows = []
+            for robot_cell, label in zip(free.tolist(), free_labels.tolist()):
+                others = [cell for cell in free[free_labels == label].tolist() if cell != robot_cell]
+                rows.extend((robot_cell,) + kebab_cells for kebab_cells in combinations(others, num_kebabs))
+            block = np.empty((len(rows), width), dtype=dtype)
+            block[:, :1 + num_kebabs] = np.array(rows, dtype=dtype).reshape(len(rows), 1 + num_kebabs)
+        block[:, 1 + num_kebabs:] = bomb_cells
+        blocks.append(block)
+    return np.concatenate(blocks) if blocks else np.empty((0, width), dtype=dtype)
+
+
+def get_layout_table(grid_size, num_bombs, num_kebabs=1, cache_dir=None):
+    """
+    Returns the read-only table of valid layouts, built once per process.
+    With cache_dir the table is also stored as .npy and memory-mapped, so separate processes share one copy.
+    Returns None when the board is too large to enumerate.
+    """
+    key = (grid_size, num_bombs, num_kebabs)
+    if key in _layout_tables:
+        return _layout_tables[key]
+    if count_candidate_layouts(grid_size, num_bombs, num_kebabs) > MAX_ENUMERATED_LAYOUTS:
+        _layout_tables[key] = None
+        return None
+
+    table = None
+    if cache_dir is not None:
+        path = os.path.join(cache_dir, f"layouts_{grid_size}x{grid_size}_{num_bombs}_{num_kebabs}.npy")
+        if not os.path.exists(path):
+            os.makedirs(cache_dir, exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            with open(temp_path, "wb") as f:
+                np.save(f, enumerate_layouts(grid_size, num_bombs, num_kebabs))
+            os.replace(temp_path, path)  # Atomic, concurrent writers produce identical files
+        table = np.load(path, mmap_mode="r")
+    else:
+        table = enumerate_layouts(grid_size, num_bombs, num_kebabs)
+        table.flags.writeable = False
+
+    _layout_tables[key] = table
+    return table
+
+
+class LayoutSampler:
+    """Draws valid layouts uniformly: one index into the layout table, or rejection sampling on large boards."""
+
+    def __init__(self, grid_size, num_bombs, num_kebabs=1, cache_dir=None):
+        self.grid_size = grid_size
+        self.num_bombs = num_bombs
+        self.num_kebabs = num_kebabs
+        self.table = get_layout_table(grid_size, num_bombs, num_kebabs, cache_dir)
+        self.component_cache = {}  # Sorted bomb cells -> component labels
+
+    def get_components(self, bomb_cells):
+        """Component labels for a bomb configuration, cached since bombs repeat across episodes on small boards."""
+        key = tuple(sorted(bomb_cells))
+        labels = self.component_cache.get(key)
+        if labels is None:
+            if len(self.component_cache) >= COMPONENT_CACHE_SIZE:
+                del self.component_cache[next(iter(self.component_cache))]  # Drop the oldest entry
+            labels = label_components(self.grid_size, key)
+            self.component_cache[key] = labels
+        return labels
+
+    def sample(self, rng):
+        """Returns (robot_cell, kebab_cells, bomb_cells) drawn with a seeding.BlockRandom, kebabs and bombs in ascending order."""
+        split = 1 + self.num_kebabs
+        if self.table is not None:
+            layout = self.table[rng.randrange(len(self.table))].tolist()
+            return layout[0], layout[1:split], layout[split:]
+
+        num_cells = self.grid_size * self.grid_size
+        while True:
+            cells = rng.sample(num_cells, split + self.num_bombs)
+            labels = self.get_components(cells[split:])
+            robot_label = labels[cells[0]]
+            if all(labels[cell] == robot_label for cell in cells[1:split]):
+                # Sorted like the rows of enumerate_layouts, so one board always has the same cell tuples
+                return cells[0], sorted(cells[1:split]), sorted(cells[split:])
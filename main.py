@@ -1,7 +1,12 @@
 from setting import *
 import pygame
 from environment import KebabHunterEnvironment
-from q_learning import QLearningAgent
+from policy import GreedyPolicy
+import argparse
+import time
+
+# Display refresh rate, independent of how many simulation steps run per second
+RENDER_FPS = 30
 
 def select_q_table_file():
     """Prompts the user to input the Q-table file path."""
@@ -46,12 +51,13 @@ def main_menu():
 
         clock.tick(30)
 
-def main():
-    mode = main_menu()
+def main(args):
+    mode = args.mode or main_menu()
     game_speed = 1  # Oyun hızını kontrol eden değişken
     if mode == "human":
         # Initialize the environment
-        env = KebabHunterEnvironment()
+        env = KebabHunterEnvironment(grid_size=args.grid_size, cell_size=args.cell_size, render_mode="human",
+                                     num_bombs=args.num_bombs, num_kebabs=args.num_kebabs)
         clock = pygame.time.Clock()
         running = True
 
@@ -92,45 +98,108 @@ def main():
         # Close the environment
         env.close()
     elif mode == "ai":
-        q_table_file = select_q_table_file()
+        q_table_file = args.q_table or select_q_table_file()
         if not q_table_file:
             print("No Q-table file selected. Exiting AI mode.")
             return
 
-        # Initialize the environment and agent
-        env = KebabHunterEnvironment()
-        state_size = len(env.get_state())
-        action_size = 4  # Up, Down, Left, Right
-        agent = QLearningAgent(state_size, action_size)
-        agent.load(q_table_file)
-
-        clock = pygame.time.Clock()
-        running = True
-
-        # Reset the environment
-        state = env.reset()
-
-        while running:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    running = False
-
-            # AI chooses an action
-            action = agent.choose_action(state)
+        # Initialize the environment and the frozen greedy policy, no exploration while watching
+        env = KebabHunterEnvironment(grid_size=args.grid_size, cell_size=args.cell_size, render_mode="human",
+                                     num_bombs=args.num_bombs, num_kebabs=args.num_kebabs)
+        policy = GreedyPolicy.from_file(q_table_file)
+        watch_ai(env, policy, args.speed, args.frame_skip, args.turbo, args.max_steps)
+
+def watch_ai(env, policy, speed=1.0, frame_skip=0, turbo=False, max_steps=100):
+    """
+    Plays the policy with the simulation decoupled from the display, which always refreshes at RENDER_FPS.
+      speed: simulation steps per second
+      frame_skip: if set, every displayed frame advances this many steps instead, speed is ignored
+      turbo: steps as fast as possible for the whole frame budget and shows only the last board
+    Keys: T toggles turbo, + and - double or halve the speed (or the frame skip).
+    """
+    clock = pygame.time.Clock()
+    frame_budget = 1.0 / RENDER_FPS
+    state = env.reset()
+    episode_steps = 0
+    episodes = steps = 0
+    accumulator = 0.0
+    report_time, report_episodes = time.perf_counter(), 0
+    running = True
+
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_t:
+                    turbo = not turbo
+                elif event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                    if frame_skip:
+                        frame_skip *= 2
+                    else:
+                        speed *= 2
+                elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                    if frame_skip:
+                        frame_skip = max(1, frame_skip // 2)
+                    else:
+                        speed /= 2
+
+        # Number of simulation steps for this frame
+        frame_start = time.perf_counter()
+        if turbo:
+            budget = None
+        elif frame_skip:
+            budget = frame_skip
+        else:
+            accumulator += clock.get_time() / 1000 * speed
+            budget = int(accumulator)
+            accumulator -= budget
+        verbose = not turbo and budget is not None and budget <= 1
+
+        taken = 0
+        while budget is None or taken < budget:
+            action = policy(state)
             state, reward, done = env.step(action)
-            print(f"State: {state}, Reward: {reward}, Done: {done}")
-            if done:
-                print("Episode finished! Resetting environment...")
+            episode_steps += 1
+            taken += 1
+            if verbose:
+                print(f"State: {state}, Reward: {reward}, Done: {done}")
+            if done or episode_steps >= max_steps:
+                if verbose:
+                    print("Episode finished! Resetting environment...")
                 state = env.reset()
+                episode_steps = 0
+                episodes += 1
+            # Turbo checks the clock every 64 steps, stopping in time to draw the frame
+            if budget is None and taken % 64 == 0 and time.perf_counter() - frame_start >= frame_budget:
+                break
+        steps += taken
 
-            # Render the environment
-            env.render()
+        # Render only the final board of the frame, the renderer pushes just the cells that changed
+        env.render()
 
-            # Cap the frame rate
-            clock.tick(game_speed)  # Oyun hızını kontrol eden satır
+        now = time.perf_counter()
+        if now - report_time >= 1.0:
+            mode = "turbo" if turbo else f"{frame_skip} steps/frame" if frame_skip else f"{speed:g} steps/s"
+            pygame.display.set_caption(f"Kebab Hunter - {mode}, {(episodes - report_episodes) / (now - report_time):.0f} episodes/s")
+            report_time, report_episodes = now, episodes
 
-        # Close the environment
-        env.close()
+        # The display runs at a fixed rate, in turbo the simulation already used up the frame
+        clock.tick(RENDER_FPS)
+
+    print(f"Played {episodes} episodes in {steps} steps.")
+    env.close()
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Play Kebab Hunter or watch a trained policy")
+    parser.add_argument("--mode", choices=("human", "ai"), help="skip the menu")
+    parser.add_argument("--q-table", help="pickled Q-table or checkpoint for AI mode")
+    parser.add_argument("--grid-size", type=int, default=3)
+    parser.add_argument("--cell-size", type=int, default=100)
+    parser.add_argument("--num-bombs", type=int, default=2)
+    parser.add_argument("--num-kebabs", type=int, default=1)
+    parser.add_argument("--max-steps", type=int, default=100, help="AI episodes are cut off after this many steps")
+    parser.add_argument("--speed", type=float, default=1.0, help="AI steps per second")
+    parser.add_argument("--frame-skip", type=int, default=0, help="AI steps per displayed frame, overrides --speed")
+    parser.add_argument("--turbo", action="store_true", help="play as fast as possible, show one frame per refresh")
+    main(parser.parse_args())
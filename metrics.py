@@ -0,0 +1,161 @@
+import numpy as np
+import threading
+import queue
+import math
+
+LOGGING_MODES = ("async", "sync", "none")
+
+
+class RingBuffer:
+    """Fixed-size buffer of the most recent values, memory does not grow with the number of episodes."""
+
+    def __init__(self, capacity):
+        self.values = np.zeros(capacity)
+        self.capacity = capacity
+        self.index = 0
+        self.count = 0
+
+    def append(self, value):
+        self.values[self.index] = value
+        self.index = (self.index + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def extend(self, values):
+        """Appends a batch of values in order, only the last `capacity` of them are kept."""
+        values = np.asarray(values, dtype=float)
+        kept = values[-self.capacity:]
+        positions = (self.index + len(values) - len(kept) + np.arange(len(kept))) % self.capacity
+        self.values[positions] = kept
+        self.index = (self.index + len(values)) % self.capacity
+        self.count = min(self.count + len(values), self.capacity)
+
+    def mean(self):
+        return float(self.values[:self.count].mean()) if self.count else 0.0
+
+    def __len__(self):
+        return self.count
+
+
+class RunningStats:
+    """Count, mean, variance (Welford), min and max of a stream without storing it."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def update_batch(self, values):
+        """Merges the statistics of a batch of values (Chan et al.), equivalent to updating one at a time."""
+        values = np.asarray(values, dtype=float)
+        if not len(values):
+            return
+        count = self.count + len(values)
+        batch_mean = float(values.mean())
+        delta = batch_mean - self.mean
+        self.m2 += float(((values - batch_mean) ** 2).sum()) + delta * delta * self.count * len(values) / count
+        self.mean += delta * len(values) / count
+        self.count = count
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+    @property
+    def std(self):
+        return math.sqrt(self.m2 / self.count) if self.count > 1 else 0.0
+
+    def as_dict(self):
+        return {"count": self.count, "mean": self.mean, "std": self.std, "min": self.min, "max": self.max}
+
+
+class MetricsLogger:
+    """
+    Episode metrics for train_agent.
+    Rewards are kept in a ring buffer and running aggregates. Scalars are written to TensorBoard every
+    log_every episodes, either from a background thread fed by a bounded queue ("async"), directly
+    ("sync"), or not at all ("none", counters stay in memory and TensorBoard is never imported).
+    """
+
+    def __init__(self, log_dir=None, mode="async", log_every=1, window=100, queue_size=1024):
+        if mode not in LOGGING_MODES:
+            raise ValueError(f"Unknown logging mode '{mode}'. Expected one of {LOGGING_MODES}.")
+        self.mode = mode
+        self.log_every = log_every
+        self.recent_rewards = RingBuffer(window)
+        self.reward_stats = RunningStats()
+        self.writer = None
+        self.queue = None
+        self.thread = None
+
+        if mode != "none":
+            from torch.utils.tensorboard import SummaryWriter
+            self.writer = SummaryWriter(log_dir=log_dir)
+        if mode == "async":
+            # Bounded, a writer that falls behind slows training down instead of growing memory
+            self.queue = queue.Queue(maxsize=queue_size)
+            self.thread = threading.Thread(target=self._write_loop, daemon=True)
+            self.thread.start()
+
+    def _write_scalars(self, step, scalars):
+        for tag, value in scalars.items():
+            self.writer.add_scalar(tag, value, step)
+
+    def _write_loop(self):
+        """Background thread: drains everything that is queued and writes it in one batch."""
+        while True:
+            batch = [self.queue.get()]
+            while True:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            for item in batch:
+                if item is None:
+                    return
+                self._write_scalars(*item)
+
+    def should_log(self, episode):
+        """True for the episodes whose scalars are written, the caller can skip computing the rest."""
+        return self.mode != "none" and episode % self.log_every == 0
+
+    def record_episode(self, total_reward):
+        self.recent_rewards.append(total_reward)
+        self.reward_stats.update(total_reward)
+
+    def record_episodes(self, total_rewards):
+        """record_episode for a batch of episodes, e.g. one call of the fused rollout."""
+        self.recent_rewards.extend(total_rewards)
+        self.reward_stats.update_batch(total_rewards)
+
+    def average_reward(self):
+        """Average total reward over the last `window` episodes."""
+        return self.recent_rewards.mean()
+
+    def log_scalars(self, step, scalars):
+        """Writes a dict of {tag: value} for one step."""
+        if self.mode == "async":
+            self.queue.put((step, scalars))
+        elif self.mode == "sync":
+            self._write_scalars(step, scalars)
+
+    def summary(self):
+        return {"episodes": self.reward_stats.count, "average_reward": self.average_reward(),
+                "total_reward": self.reward_stats.as_dict()}
+
+    def close(self):
+        """Flushes pending scalars and closes the TensorBoard writer."""
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
@@ -0,0 +1,174 @@
+from setting import *
+from environment import KebabHunterEnvironment
+from q_learning import QLearningAgent
+from train import get_unique_run_dir
+from seeding import spawn_seeds
+import multiprocessing as mp
+import numpy as np
+import time
+import os
+
+MERGE_MODES = ("average", "central")
+
+
+def run_worker(worker_id, seed, connection, max_steps, merge):
+    """Worker process: trains (or only acts, for the central learner) on its own environment between syncs."""
+    env_seed, agent_seed = spawn_seeds(seed, 2)
+    env = KebabHunterEnvironment(seed=env_seed)
+    agent = QLearningAgent(len(env.get_state()), 4, seed=agent_seed)
+    learn = merge == "average"
+
+    while True:
+        message = connection.recv()
+        if message is None:
+            break
+        q_table, num_episodes = message
+        agent.q_table[:] = q_table  # In place, the agent's flat views share this buffer
+
+        transitions = ([], [], [], [])
+        episode_rewards = []
+        start = time.perf_counter()
+        for _ in range(num_episodes):
+            state = env.reset()
+            total_reward = 0
+
+            for step in range(max_steps):
+                action = agent.choose_action(state)
+                next_state, reward, done = env.step(action)
+                if learn:
+                    agent.update_q_value(state, action, reward, next_state)
+                else:
+                    for column, value in zip(transitions, (state, action, reward, next_state)):
+                        column.append(value)
+                state = next_state
+                total_reward += reward
+
+                if done:
+                    break
+
+            agent.decay_exploration()
+            episode_rewards.append(total_reward)
+        elapsed = time.perf_counter() - start
+
+        payload = agent.q_table if learn else tuple(np.array(column) for column in transitions)
+        connection.send((worker_id, payload, episode_rewards, elapsed, agent.exploration_rate))
+    connection.close()
+
+
+def average_q_tables(q_table, worker_tables):
+    """Averages every entry over the workers that changed it during the round, other entries are kept."""
+    stacked = np.stack(worker_tables)
+    changed = stacked != q_table
+    counts = changed.sum(axis=0)
+    summed = np.where(changed, stacked, 0.0).sum(axis=0)
+    return np.where(counts > 0, summed / np.maximum(counts, 1), q_table)
+
+
+def train_parallel(num_workers=None, episodes=10000000, max_steps=100, sync_interval=1000, merge="average",
+                   seed=0, learner_batch_size=256, save=True):
+    """
+    Trains one Q-table with K worker processes, each with its own seeded environment and agent.
+    Every sync_interval episodes per worker the Q-tables are synchronised:
+      "average": workers learn locally and the changed entries are averaged across workers
+      "central": workers only act and a central learner applies their transitions in minibatches
+    Returns: the merged agent and a throughput report
+    """
+    if merge not in MERGE_MODES:
+        raise ValueError(f"Unknown merge mode '{merge}'. Expected one of {MERGE_MODES}.")
+    num_workers = num_workers or os.cpu_count()
+
+    agent = QLearningAgent(8, 4)
+    context = mp.get_context()
+    connections, processes = [], []
+    worker_seeds = spawn_seeds(seed, num_workers)  # Independent streams, workers are never correlated
+    for worker_id in range(num_workers):
+        parent_connection, child_connection = context.Pipe()
+        process = context.Process(
+            target=run_worker,
+            args=(worker_id, worker_seeds[worker_id], child_connection, max_steps, merge),
+            daemon=True,
+        )
+        process.start()
+        connections.append(parent_connection)
+        processes.append(process)
+
+    worker_episodes = np.zeros(num_workers, dtype=np.int64)
+    worker_time = np.zeros(num_workers)
+    recent_rewards = []
+    remaining = episodes
+    start = time.perf_counter()
+    try:
+        while remaining > 0:
+            # Hand out the next round, the last one may not use every worker
+            round_episodes = [0] * num_workers
+            for worker_id in range(num_workers):
+                round_episodes[worker_id] = min(sync_interval, remaining)
+                remaining -= round_episodes[worker_id]
+            active = [worker_id for worker_id in range(num_workers) if round_episodes[worker_id] > 0]
+            for worker_id in active:
+                connections[worker_id].send((agent.q_table, round_episodes[worker_id]))
+
+            results = [connections[worker_id].recv() for worker_id in active]
+            recent_rewards = []
+            exploration_rates = []
+            worker_tables = []
+            for worker_id, payload, episode_rewards, elapsed, exploration_rate in results:
+                worker_episodes[worker_id] += len(episode_rewards)
+                worker_time[worker_id] += elapsed
+                recent_rewards.extend(episode_rewards)
+                exploration_rates.append(exploration_rate)
+                if merge == "average":
+                    worker_tables.append(payload)
+                else:
+                    states, actions, rewards, next_states = payload
+                    for begin in range(0, len(actions), learner_batch_size):
+                        batch = slice(begin, begin + learner_batch_size)
+                        agent.update_q_values(states[batch], actions[batch], rewards[batch], next_states[batch])
+
+            if merge == "average":
+                merged = average_q_tables(agent.q_table, worker_tables)
+                agent.visited |= merged != agent.q_table
+                agent.q_table[:] = merged
+            agent.exploration_rate = float(np.mean(exploration_rates))
+
+            done_episodes = episodes - remaining
+            elapsed = time.perf_counter() - start
+            print(f"Episode {done_episodes}/{episodes}, Average Reward: {np.mean(recent_rewards):.2f}, "
+                  f"Exploration Rate: {agent.exploration_rate:.4f}, Q-Table Size: {agent.q_table_size()}, "
+                  f"Episodes/sec: {done_episodes / elapsed:.0f}")
+    finally:
+        for connection in connections:
+            connection.send(None)
+        for process in processes:
+            process.join()
+
+    wall_time = time.perf_counter() - start
+    per_worker = worker_episodes / np.maximum(worker_time, 1e-9)
+    report = {
+        "num_workers": num_workers,
+        "merge": merge,
+        "episodes": int(worker_episodes.sum()),
+        "wall_time": wall_time,
+        "episodes_per_sec_total": float(worker_episodes.sum() / wall_time),
+        "episodes_per_sec_per_worker": per_worker.tolist(),
+        "mean_episodes_per_sec_per_worker": float(per_worker.mean()),
+        # Total throughput relative to K ideal workers, 1.0 is perfectly linear scaling
+        "scaling_efficiency": float(worker_episodes.sum() / wall_time / per_worker.sum()),
+    }
+    print(f"Total: {report['episodes_per_sec_total']:.0f} episodes/sec, "
+          f"per worker: {report['mean_episodes_per_sec_per_worker']:.0f} episodes/sec, "
+          f"scaling efficiency: {report['scaling_efficiency']:.2f}")
+
+    if save:
+        os.makedirs(SAVE_DIR, exist_ok=True)
+        table_dir = os.path.join(get_unique_run_dir(SAVE_DIR), "table")
+        os.makedirs(table_dir, exist_ok=True)
+        q_table_path = os.path.join(table_dir, "q_table.pkl")
+        agent.save(q_table_path)
+        print(f"Training completed. Q-table saved to '{q_table_path}'.")
+
+    return agent, report
+
+
+if __name__ == "__main__":
+    train_parallel(episodes=1000000)
@@ -0,0 +1,250 @@
+from environment import KebabHunterEnvironment
+from q_learning import QLearningAgent, STATE_INDEX, NUM_STATES
+from metrics import RingBuffer
+from policy import GreedyPolicy
+from evaluate import evaluate
+from seeding import spawn_seeds
+import numpy as np
+import argparse
+import heapq
+import json
+import time
+import os
+
+# "prioritized" backs up the pairs with the largest model TD error first, "uniform" is Dyna-Q's random replay
+PLANNING_MODES = ("prioritized", "uniform")
+# Agents of the default comparison report: (name, PlanningAgent options), planning_steps=0 is plain Q-learning
+DEFAULT_CONFIGS = [
+    ("q_learning", {"planning_steps": 0}),
+    ("dyna_q_10", {"planning": "uniform", "planning_steps": 10}),
+    ("prioritized_sweeping_5", {"planning": "prioritized", "planning_steps": 5}),
+    ("prioritized_sweeping_20", {"planning": "prioritized", "planning_steps": 20}),
+]
+
+
+class PlanningAgent(QLearningAgent):
+    """
+    Q-learning agent that also learns a tabular model of its transitions and plans with it.
+    Each real update_q_value is followed by up to planning_steps simulated backups of
+    Q(s, a) <- R(s, a) + discount * sum over s' of P(s' | s, a) * max Q(s'), from the mean observed reward and
+    the observed next-state frequencies. Like update_q_value, the backup bootstraps from the next state at the
+    end of an episode too. planning="prioritized" (prioritized sweeping) picks the pair with the largest
+    |backup - Q| from a heap and queues the predecessors of every state it changes, "uniform" (Dyna-Q) replays
+    observed pairs at random. Only the scalar update_q_value feeds the model.
+    """
+
+    def __init__(self, state_size, action_size, planning_steps=10, planning="prioritized", priority_threshold=1e-4,
+                 planning_rate=1.0, **kwargs):
+        super().__init__(state_size, action_size, **kwargs)
+        if planning not in PLANNING_MODES:
+            raise ValueError(f"Unknown planning mode '{planning}'. Expected one of {PLANNING_MODES}.")
+        self.planning_steps = planning_steps
+        self.planning = planning
+        self.priority_threshold = priority_threshold
+        self.planning_rate = planning_rate  # Step size of the simulated backups, 1.0 replaces Q with the backup
+        self.planning_backups = 0
+
+        # Model and priorities indexed like the flat Q-table (row * action_size + action)
+        num_pairs = NUM_STATES * action_size
+        self.model_counts = np.zeros(num_pairs, dtype=np.int64)
+        self.model_reward_sums = np.zeros(num_pairs)
+        self.priorities = np.zeros(num_pairs)
+        self._counts = memoryview(self.model_counts)
+        self._reward_sums = memoryview(self.model_reward_sums)
+        self._priorities = memoryview(self.priorities)
+        self.successors = [None] * num_pairs  # Pair -> {next row: count}, only for observed pairs
+        self.predecessors = [set() for _ in range(NUM_STATES)]  # Row -> pairs that led to it
+        self.observed = []  # Observed pairs in the order they were first seen, sampled by Dyna-Q
+        self.queue = []  # Heap of (-priority, pair), entries whose priority is outdated are skipped
+
+    def model_backup(self, pair):
+        """The expected one-step backup of a pair under the learned model."""
+        flat_q = self._flat_q
+        action_size = self.action_size
+        expected_next_q = 0.0
+        for next_row, count in self.successors[pair].items():
+            start = next_row * action_size
+            expected_next_q += count * max(flat_q[start:start + action_size])
+        count = self._counts[pair]
+        return (self._reward_sums[pair] + self.discount_factor * expected_next_q) / count
+
+    def queue_pair(self, pair):
+        """Queues a pair when its model TD error beats both the threshold and the priority it is queued with."""
+        priority = abs(self.model_backup(pair) - self._flat_q[pair])
+        if priority > self.priority_threshold and priority > self._priorities[pair]:
+            self._priorities[pair] = priority
+            heapq.heappush(self.queue, (-priority, pair))
+
+    def pop_pair(self):
+        """Returns the queued pair with the highest priority, or None once the queue is empty."""
+        queue, priorities = self.queue, self._priorities
+        while queue:
+            priority, pair = heapq.heappop(queue)
+            if -priority == priorities[pair]:
+                priorities[pair] = 0.0
+                return pair
+        return None
+
+    def update_q_value(self, state, action, reward, next_state):
+        super().update_q_value(state, action, reward, next_state)
+        if not self.planning_steps:
+            return
+
+        pair = STATE_INDEX[state] * self.action_size + action
+        next_row = STATE_INDEX[next_state]
+        successors = self.successors[pair]
+        if successors is None:
+            successors = self.successors[pair] = {}
+            self.observed.append(pair)
+        successors[next_row] = successors.get(next_row, 0) + 1
+        self.predecessors[next_row].add(pair)
+        self._counts[pair] += 1
+        self._reward_sums[pair] += reward
+
+        if self.planning == "prioritized":
+            self.queue_pair(pair)
+        self.plan()
+
+    def plan(self):
+        """Runs up to planning_steps simulated backups."""
+        flat_q = self._flat_q
+        action_size = self.action_size
+        prioritized = self.planning == "prioritized"
+        for _ in range(self.planning_steps):
+            if prioritized:
+                pair = self.pop_pair()
+                if pair is None:
+                    break
+            else:
+                pair = self.observed[self.random.randrange(len(self.observed))]
+            row = pair // action_size
+            start = row * action_size
+            old_value = max(flat_q[start:start + action_size])
+            flat_q[pair] += self.planning_rate * (self.model_backup(pair) - flat_q[pair])
+            self._flat_visited[pair] = True
+            self.planning_backups += 1
+            # Backups leading to this state only read its max Q, the predecessors need a look when it changed
+            if prioritized and max(flat_q[start:start + action_size]) != old_value:
+                for predecessor in self.predecessors[row]:
+                    self.queue_pair(predecessor)
+
+
+def train_until(agent, env, target_reward, window=100, max_episodes=20000, max_steps=100):
+    """
+    Trains until the average total reward over the last `window` episodes reaches target_reward.
+    Returns: episodes, environment steps and wall-clock seconds spent, and whether the target was reached
+    """
+    recent_rewards = RingBuffer(window)
+    env_steps = 0
+    reached = False
+    start = time.perf_counter()
+    episode = 0
+    while episode < max_episodes:
+        state = env.reset()
+        total_reward = 0
+        for step in range(max_steps):
+            action = agent.choose_action(state)
+            next_state, reward, done = env.step(action)
+            agent.update_q_value(state, action, reward, next_state)
+            state = next_state
+            total_reward += reward
+            env_steps += 1
+            if done:
+                break
+        agent.decay_exploration()
+        recent_rewards.append(total_reward)
+        episode += 1
+        if len(recent_rewards) == window and recent_rewards.mean() >= target_reward:
+            reached = True
+            break
+    return {"episodes": episode, "env_steps": env_steps, "seconds": time.perf_counter() - start, "reached": reached,
+            "average_reward": recent_rewards.mean()}
+
+
+def compare(configs=DEFAULT_CONFIGS, target_reward=0.1, seeds=(0, 1, 2, 3, 4), window=100, max_episodes=20000,
+            max_steps=100, eval_episodes=2000, grid_size=3, num_bombs=2, num_kebabs=1):
+    """
+    Trains every agent configuration once per seed until the target average reward and reports the cost:
+    episodes, environment steps and wall-clock seconds, plus the greedy policy's evaluate() scores.
+    Every configuration sees the same environment and agent seeds. Costs are averaged over every seed: a run that
+    never reached the target counts with the max_episodes, steps and seconds it used, so a row with
+    "lower_bound" set is a censored estimate of its true cost.
+    Returns: {"params": ..., "results": one row per configuration}
+    """
+    results = []
+    for name, options in configs:
+        runs = []
+        for seed in seeds:
+            env_seed, agent_seed, eval_seed = spawn_seeds(seed, 3)
+            env = KebabHunterEnvironment(grid_size=grid_size, num_bombs=num_bombs, num_kebabs=num_kebabs, seed=env_seed)
+            agent = PlanningAgent(len(env.get_state()), 4, seed=agent_seed, **options)
+            run = train_until(agent, env, target_reward, window, max_episodes, max_steps)
+            run["planning_backups"] = agent.planning_backups
+            if eval_episodes:
+                run.update({key: value for key, value in evaluate(
+                    GreedyPolicy.from_agent(agent), episodes=eval_episodes, num_envs=min(256, eval_episodes),
+                    grid_size=grid_size, num_bombs=num_bombs, num_kebabs=num_kebabs, max_steps=max_steps,
+                    seed=eval_seed).items() if key in ("success_rate", "mean_return")})
+            runs.append(run)
+
+        reached = sum(run["reached"] for run in runs)
+        row = {"name": name, **options, "runs": len(runs), "reached": reached, "lower_bound": reached < len(runs)}
+        for key in ("episodes", "env_steps", "seconds", "planning_backups", "success_rate", "mean_return"):
+            values = [run[key] for run in runs if key in run]
+            row[key] = float(np.mean(values)) if values else float("nan")
+        results.append(row)
+    baseline = results[0]
+    for row in results:
+        for key in ("env_steps", "seconds"):
+            # None when the baseline has no usable cost, e.g. it never took a step
+            valid = np.isfinite(baseline[key]) and baseline[key] > 0
+            row[f"{key}_vs_first"] = row[key] / baseline[key] if valid else None
+    params = {"target_reward": target_reward, "seeds": list(seeds), "window": window, "max_episodes": max_episodes,
+              "max_steps": max_steps, "grid_size": grid_size, "num_bombs": num_bombs, "num_kebabs": num_kebabs}
+    return {"params": params, "results": results}
+
+
+def format_ratio(ratio):
+    return "  n/a" if ratio is None else f"{ratio:5.2f}x"
+
+
+def print_report(report):
+    params = report["params"]
+    print(f"Cost to reach an average reward of {params['target_reward']} over {params['window']} episodes "
+          f"({len(params['seeds'])} seeds, relative to the first row, >= marks rows with runs that never got there):")
+    for row in report["results"]:
+        bound = ">=" if row["lower_bound"] else "  "
+        print(f"{row['name']:<26} reached {row['reached']}/{row['runs']}  episodes {bound}{row['episodes']:9.0f}  "
+              f"env steps {bound}{row['env_steps']:9.0f} ({format_ratio(row['env_steps_vs_first'])})  "
+              f"seconds {bound}{row['seconds']:7.2f} ({format_ratio(row['seconds_vs_first'])})  "
+              f"backups {row['planning_backups']:9.0f}  success rate {row['success_rate']:.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare plain Q-learning with Dyna-Q and prioritized sweeping")
+    parser.add_argument("--configs", help="JSON list of [name, PlanningAgent options] pairs or a path to one")
+    parser.add_argument("--target-reward", type=float, default=0.1)
+    parser.add_argument("--seeds", type=int, default=5, help="runs per configuration, seeded 0..N-1")
+    parser.add_argument("--window", type=int, default=100)
+    parser.add_argument("--max-episodes", type=int, default=20000)
+    parser.add_argument("--max-steps", type=int, default=100)
+    parser.add_argument("--eval-episodes", type=int, default=2000)
+    parser.add_argument("--grid-size", type=int, default=3)
+    parser.add_argument("--num-bombs", type=int, default=2)
+    parser.add_argument("--num-kebabs", type=int, default=1)
+    parser.add_argument("--output", default="planning_report.json")
+    args = parser.parse_args()
+
+    configs = DEFAULT_CONFIGS
+    if args.configs:
+        if os.path.exists(args.configs):
+            with open(args.configs) as f:
+                configs = json.load(f)
+        else:
+            configs = json.loads(args.configs)
+    report = compare(configs, args.target_reward, range(args.seeds), args.window, args.max_episodes, args.max_steps,
+                     args.eval_episodes, args.grid_size, args.num_bombs, args.num_kebabs)
+    print_report(report)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report saved to '{args.output}'.")
@@ -0,0 +1,34 @@
+from q_learning import QLearningAgent, STATE_INDEX, encode_states
+import numpy as np
+
+
+class GreedyPolicy:
+    """
+    Frozen greedy policy of a trained Q-table: the best action of every state is looked up, not computed.
+    Ties go to the lowest action index, the same as np.argmax, so the policy is deterministic.
+    """
+
+    def __init__(self, q_table):
+        self.actions = np.asarray(q_table).argmax(axis=1).astype(np.int64)
+        self.action_list = self.actions.tolist()  # Python ints for the scalar path
+
+    @classmethod
+    def from_agent(cls, agent):
+        return cls(agent.q_table)
+
+    @classmethod
+    def from_file(cls, filepath):
+        """Builds the policy from a pickled Q-table or a checkpoint, checkpoints are memory-mapped."""
+        agent = QLearningAgent(8, 4)
+        agent.load(filepath, mmap=True)
+        return cls(agent.q_table)
+
+    def __call__(self, state):
+        """Action for a single state tuple."""
+        return self.action_list[STATE_INDEX[state]]
+
+    choose_action = __call__  # Drop-in for QLearningAgent.choose_action
+
+    def act_batch(self, states):
+        """Actions for an (N, 8) array of states."""
+        return self.actions[encode_states(states)]
@@ -0,0 +1,171 @@
+from collections import Counter
+import threading
+import signal
+import json
+import time
+import sys
+import os
+
+
+class Instrumentation:
+    """
+    Opt-in counters and timers for the training hot path.
+    wrap() returns a timed version of a function, so code that is not instrumented keeps calling the
+    original and pays nothing. Totals are aggregated every `window` episodes into a history of snapshots.
+    """
+
+    def __init__(self, window=1000):
+        self.window = window
+        self.timers = {}  # name -> [calls, total ns, max ns], for the current window
+        self.totals = {}  # name -> [calls, total ns, max ns], for the whole run
+        self.history = []
+        self.episodes = 0
+        self.window_start = time.perf_counter_ns()
+        self.run_start = self.window_start
+
+    def wrap(self, name, function):
+        """Returns `function` timed under `name`."""
+        stats = self.timers.setdefault(name, [0, 0, 0])
+        clock = time.perf_counter_ns
+
+        def timed(*args):
+            start = clock()
+            result = function(*args)
+            elapsed = clock() - start
+            stats[0] += 1
+            stats[1] += elapsed
+            if elapsed > stats[2]:
+                stats[2] = elapsed
+            return result
+        return timed
+
+    def end_episode(self):
+        """Counts an episode. Returns: the snapshot of the window that just closed, or None"""
+        self.episodes += 1
+        if self.episodes % self.window == 0:
+            return self.snapshot()
+        return None
+
+    def snapshot(self):
+        """Closes the current window: per-timer calls, mean/max latency and share of the window's wall time."""
+        now = time.perf_counter_ns()
+        wall_ns = max(now - self.window_start, 1)
+        timers = {}
+        for name, stats in self.timers.items():
+            calls, total_ns, max_ns = stats
+            timers[name] = {
+                "calls": calls,
+                "total_ms": total_ns / 1e6,
+                "mean_us": total_ns / calls / 1e3 if calls else 0.0,
+                "max_us": max_ns / 1e3,
+                "share": total_ns / wall_ns,
+            }
+            run_stats = self.totals.setdefault(name, [0, 0, 0])
+            run_stats[0] += calls
+            run_stats[1] += total_ns
+            run_stats[2] = max(run_stats[2], max_ns)
+            stats[:] = [0, 0, 0]  # In place, the wrappers hold on to these lists
+        window = self.episodes % self.window or self.window
+        snapshot = {"episode": self.episodes, "wall_ms": wall_ns / 1e6,
+                    "episodes_per_sec": window / (wall_ns / 1e9), "timers": timers}
+        self.history.append(snapshot)
+        self.window_start = now
+        return snapshot
+
+    def scalars(self, snapshot):
+        """TensorBoard tags of a snapshot, for MetricsLogger.log_scalars."""
+        scalars = {"perf/episodes_per_sec": snapshot["episodes_per_sec"]}
+        for name, stats in snapshot["timers"].items():
+            scalars[f"perf/{name}/mean_us"] = stats["mean_us"]
+            scalars[f"perf/{name}/share"] = stats["share"]
+        return scalars
+
+    def summary(self):
+        """Whole-run totals and every window snapshot, JSON-serialisable."""
+        if self.episodes % self.window or any(stats[0] for stats in self.timers.values()):
+            self.snapshot()  # Fold the partial last window into the totals
+        wall_ns = max(time.perf_counter_ns() - self.run_start, 1)
+        totals = {
+            name: {"calls": calls, "total_ms": total_ns / 1e6, "mean_us": total_ns / calls / 1e3 if calls else 0.0,
+                   "max_us": max_ns / 1e3, "share": total_ns / wall_ns}
+            for name, (calls, total_ns, max_ns) in self.totals.items()
+        }
+        return {"episodes": self.episodes, "wall_ms": wall_ns / 1e6, "window": self.window,
+                "totals": totals, "history": self.history}
+
+    def write_json(self, filepath):
+        with open(filepath, "w") as f:
+            json.dump(self.summary(), f, indent=2)
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler: records the Python stack every `interval` seconds of CPU time.
+    In the main thread of a Unix process a SIGPROF timer interrupts the profiled code itself, so samples land
+    on whatever bytecode is running. Elsewhere a background thread samples the calling thread instead, with
+    the GIL switch interval lowered to `interval` so it is not limited to one sample per 5 ms.
+    write_collapsed() emits the "frame;frame;frame count" format read by flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, interval=0.001):
+        self.interval = interval
+        self.thread_id = threading.get_ident()
+        self.use_signal = hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread()
+        self.stacks = Counter()
+        self.samples = 0
+        self.running = False
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.previous_handler = None
+        self.switch_interval = None
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        if self.use_signal:
+            self.previous_handler = signal.signal(signal.SIGPROF, self._handle_signal)
+            signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        else:
+            self.switch_interval = sys.getswitchinterval()
+            sys.setswitchinterval(min(self.switch_interval, self.interval))
+            self.stop_event.clear()
+            self.thread = threading.Thread(target=self._sample_loop, daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        if self.use_signal:
+            signal.setitimer(signal.ITIMER_PROF, 0, 0)
+            signal.signal(signal.SIGPROF, self.previous_handler)
+        else:
+            self.stop_event.set()
+            self.thread.join()
+            self.thread = None
+            sys.setswitchinterval(self.switch_interval)
+
+    def record(self, frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+            frame = frame.f_back
+        self.stacks[";".join(reversed(stack))] += 1
+        self.samples += 1
+
+    def _handle_signal(self, signum, frame):
+        self.record(frame)
+
+    def _sample_loop(self):
+        while not self.stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.record(frame)
+
+    def write_collapsed(self, filepath):
+        """Writes one line per distinct stack, outermost frame first, most frequent first."""
+        with open(filepath, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
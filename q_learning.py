@@ -1,9 +1,42 @@
+from seeding import make_rng, BlockRandom
+from checkpoint import is_checkpoint, load_checkpoint, save_checkpoint
 import numpy as np
-import random
 import pickle
+from itertools import product
+
+# States from KebabHunterEnvironment.get_state: 4 kebab direction bits followed by 4 danger values in {-1, 0, 1}
+STATE_FEATURE_VALUES = [(0, 1)] * 4 + [(-1, 0, 1)] * 4
+NUM_STATES = 2 ** 4 * 3 ** 4
+# Mixed radix encoding: row = sum((feature - offset) * weight)
+STATE_OFFSETS = np.array([0, 0, 0, 0, -1, -1, -1, -1])
+STATE_WEIGHTS = np.array([1, 2, 4, 8, 16, 48, 144, 432])
+
+
+def encode_states(states):
+    """Maps an (N, 8) array of states to their Q-table rows."""
+    return (np.asarray(states, dtype=np.int64) - STATE_OFFSETS) @ STATE_WEIGHTS
+
+
+def decode_state(index):
+    """Returns the state tuple stored in the given Q-table row."""
+    state = []
+    for weight, offset in zip(STATE_WEIGHTS.tolist(), STATE_OFFSETS.tolist()):
+        base = 2 if offset == 0 else 3
+        state.append((index // weight) % base + offset)
+    return tuple(state)
+
+
+# Every possible state tuple mapped to its row, a dict lookup is the fastest scalar path
+STATE_INDEX = {state: int(encode_states([state])[0]) for state in product(*STATE_FEATURE_VALUES)}
+
+
+def encode_state(state):
+    """Returns the Q-table row of a single state tuple."""
+    return STATE_INDEX[tuple(state)]
+
 
 class QLearningAgent:
-    def __init__(self, state_size, action_size, learning_rate=0.2, discount_factor=0.95, exploration_rate=1.0, exploration_decay=0.99, min_exploration_rate=0.01):
+    def __init__(self, state_size, action_size, learning_rate=0.2, discount_factor=0.95, exploration_rate=1.0, exploration_decay=0.99, min_exploration_rate=0.01, seed=None):
         self.state_size = state_size
         self.action_size = action_size
         self.learning_rate = learning_rate
@@ -11,30 +44,127 @@ class QLearningAgent:
         self.exploration_rate = exploration_rate
         self.exploration_decay = exploration_decay
         self.min_exploration_rate = min_exploration_rate
-        self.q_table = {}
+        self.rng = make_rng(seed)
+        self.random = BlockRandom(self.rng)  # Pre-drawn numbers for the scalar choose_action path
+        # Dense table indexed by encode_state, visited marks the entries the old dict would hold
+        self.q_table = np.zeros((NUM_STATES, action_size))
+        self.visited = np.zeros((NUM_STATES, action_size), dtype=bool)
+        # Flat views of the same buffers, element access on a memoryview is much cheaper than on an ndarray
+        self._flat_q = memoryview(self.q_table.reshape(-1))
+        self._flat_visited = memoryview(self.visited.reshape(-1))
+
+    def set_q_table(self, q_table, visited):
+        """Uses the given arrays as the Q-table, e.g. read-only memory maps of a checkpoint."""
+        self.q_table = q_table
+        self.visited = visited
+        self._flat_q = memoryview(q_table.reshape(-1))
+        self._flat_visited = memoryview(visited.reshape(-1))
 
     def get_q_value(self, state, action):
-        return self.q_table.get((state, action), 0.0)
+        return self.q_table[encode_state(state), action]
 
     def update_q_value(self, state, action, reward, next_state):
-        max_next_q = max([self.get_q_value(next_state, a) for a in range(self.action_size)])
-        current_q = self.get_q_value(state, action)
+        flat_q = self._flat_q
+        index = STATE_INDEX[state] * self.action_size + action
+        next_row = STATE_INDEX[next_state] * self.action_size
+        max_next_q = max(flat_q[next_row:next_row + self.action_size])
+        current_q = flat_q[index]
         new_q = current_q + self.learning_rate * (reward + self.discount_factor * max_next_q - current_q)
-        self.q_table[(state, action)] = new_q
+        flat_q[index] = new_q
+        self._flat_visited[index] = True
+
+    def update_q_values(self, states, actions, rewards, next_states):
+        """
+        Applies a batch of Q-learning updates, e.g. one transition per board of a vector environment.
+        All targets are computed from the table as it was before the batch; repeated state-action
+        pairs receive the mean of their TD errors. Returns: the TD error of every transition
+        """
+        return self.update_q_rows(encode_states(states), actions, rewards, encode_states(next_states))
+
+    def update_q_rows(self, rows, actions, rewards, next_rows, weights=None):
+        """
+        update_q_values on already encoded Q-table rows, e.g. replayed from a transition log.
+        weights: optional per-transition step size multipliers, such as importance-sampling corrections
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        actions = np.asarray(actions, dtype=np.int64)
+        targets = np.asarray(rewards) + self.discount_factor * self.q_table[np.asarray(next_rows, dtype=np.int64)].max(axis=1)
+
+        flat_q = self.q_table.reshape(-1)
+        flat_index = rows * self.action_size + actions
+        td_errors = targets - flat_q[flat_index]
+
+        counts = np.bincount(flat_index, minlength=flat_q.size)
+        td_sums = np.bincount(flat_index, weights=td_errors if weights is None else td_errors * weights,
+                              minlength=flat_q.size)
+        touched = np.flatnonzero(counts)
+        flat_q[touched] += self.learning_rate * td_sums[touched] / counts[touched]
+        self.visited.reshape(-1)[touched] = True
+        return td_errors
 
     def choose_action(self, state):
-        if random.uniform(0, 1) < self.exploration_rate:
-            return random.randint(0, self.action_size - 1)
-        q_values = [self.get_q_value(state, a) for a in range(self.action_size)]
-        return np.argmax(q_values)
+        if self.random.random() < self.exploration_rate:
+            return self.random.randrange(self.action_size)
+        row = STATE_INDEX[state] * self.action_size
+        q_values = self._flat_q[row:row + self.action_size].tolist()
+        return q_values.index(max(q_values))  # First maximum, same tie-breaking as np.argmax
+
+    def choose_actions(self, states):
+        """Epsilon-greedy actions for an (N, 8) array of states."""
+        greedy = self.q_table[encode_states(states)].argmax(axis=1)
+        explore = self.rng.random(len(greedy)) < self.exploration_rate
+        return np.where(explore, self.rng.integers(0, self.action_size, len(greedy)), greedy)
 
     def decay_exploration(self):
         self.exploration_rate = max(self.min_exploration_rate, self.exploration_rate * self.exploration_decay)
 
+    def q_table_size(self):
+        """Number of state-action pairs that have been updated or loaded."""
+        return int(np.count_nonzero(self.visited))
+
+    def to_dict(self):
+        """Returns the Q-table in the original {(state, action): q_value} format."""
+        rows, actions = np.nonzero(self.visited)
+        return {
+            (decode_state(row), action): q_value
+            for row, action, q_value in zip(rows.tolist(), actions.tolist(), self.q_table[rows, actions].tolist())
+        }
+
+    def from_dict(self, q_table):
+        """Replaces the Q-table with the entries of a {(state, action): q_value} dict."""
+        self.q_table[:] = 0.0
+        self.visited[:] = False
+        for (state, action), q_value in q_table.items():
+            row = STATE_INDEX[tuple(state)]
+            self.q_table[row, int(action)] = q_value
+            self.visited[row, int(action)] = True
+
     def save(self, filepath):
         with open(filepath, 'wb') as f:
-            pickle.dump(self.q_table, f)
+            pickle.dump(self.to_dict(), f)
+
+    def save_checkpoint(self, filepath, episode=0, extra=None):
+        """Writes the binary checkpoint format, see checkpoint.py."""
+        save_checkpoint(filepath, self, episode, extra)
+
+    def load(self, filepath, mmap=False):
+        """
+        Loads a pickled Q-table or a binary checkpoint. For checkpoints the exploration rate is restored too,
+        and with mmap=True the table is used read-only straight from the file.
+        Returns: the checkpoint header, or None for a pickle
+        """
+        if not is_checkpoint(filepath):
+            with open(filepath, 'rb') as f:
+                self.from_dict(pickle.load(f))
+            return None
 
-    def load(self, filepath):
-        with open(filepath, 'rb') as f:
-            self.q_table = pickle.load(f)
+        header, q_table, visited = load_checkpoint(filepath, mmap=mmap)
+        if q_table.shape != self.q_table.shape:
+            raise ValueError(f"Checkpoint Q-table shape {q_table.shape} does not match the agent's {self.q_table.shape}.")
+        if mmap:
+            self.set_q_table(q_table, visited)
+        else:
+            self.q_table[:] = q_table
+            self.visited[:] = visited
+        self.exploration_rate = header["exploration_rate"]
+        return header
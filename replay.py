@@ -0,0 +1,341 @@
+from vector_env import VectorKebabHunterEnv
+from q_learning import QLearningAgent, STATE_INDEX, NUM_STATES, encode_states
+from checkpoint import STATE_ENCODING
+from seeding import make_rng
+import numpy as np
+import argparse
+import json
+import time
+import os
+
+# One raw little-endian file per column; states are stored as their Q-table row, 14 bytes per transition
+COLUMNS = {
+    "state": np.dtype("<u2"),
+    "action": np.dtype("u1"),
+    "reward": np.dtype("<f8"),
+    "next_state": np.dtype("<u2"),
+    "done": np.dtype("?"),
+}
+LOG_FORMAT = "kebab_transitions"
+LOG_VERSION = 1
+META_FILE = "meta.json"
+DEFAULT_CHUNK_SIZE = 65536
+# Added to |TD error| so every transition keeps a chance of being replayed
+PRIORITY_EPSILON = 1e-3
+
+
+def read_meta(path):
+    with open(os.path.join(path, META_FILE)) as f:
+        meta = json.load(f)
+    if meta.get("format") != LOG_FORMAT:
+        raise ValueError(f"'{path}' is not a transition log.")
+    if meta["version"] > LOG_VERSION:
+        raise ValueError(f"Transition log version {meta['version']} is newer than the supported version {LOG_VERSION}.")
+    if meta["state_encoding"] != STATE_ENCODING:
+        raise ValueError(f"Unsupported state encoding '{meta['state_encoding']}'.")
+    return meta
+
+
+def write_meta(path, meta):
+    """Atomic, like the checkpoints: readers see either the old or the new transition count."""
+    meta_path = os.path.join(path, META_FILE)
+    temp_path = f"{meta_path}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(meta, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, meta_path)
+
+
+class TransitionWriter:
+    """
+    Appends (state, action, reward, next_state, done) transitions to a columnar log directory.
+    Transitions are buffered and written in chunks; meta.json is only updated after a chunk is on disk,
+    so a crash loses at most the unflushed chunk and never leaves a torn record behind.
+    Opening an existing log appends to it.
+    """
+
+    def __init__(self, path, chunk_size=DEFAULT_CHUNK_SIZE, extra=None):
+        self.path = path
+        self.chunk_size = chunk_size
+        os.makedirs(path, exist_ok=True)
+        if os.path.exists(os.path.join(path, META_FILE)):
+            self.meta = read_meta(path)
+        else:
+            self.meta = {
+                "format": LOG_FORMAT,
+                "version": LOG_VERSION,
+                "state_encoding": STATE_ENCODING,
+                "columns": {name: dtype.str for name, dtype in COLUMNS.items()},
+                "count": 0,
+                "extra": extra or {},
+            }
+        self.files = {}
+        for name, dtype in COLUMNS.items():
+            f = open(os.path.join(path, f"{name}.bin"), "ab")
+            f.truncate(self.meta["count"] * dtype.itemsize)  # Drop records written after the last meta update
+            self.files[name] = f
+        self.buffers = {name: [] for name in COLUMNS}  # Single transitions from append()
+        self.pending = []  # Column dicts of batches waiting for the next flush
+        self.pending_count = 0
+        write_meta(path, self.meta)
+
+    def __len__(self):
+        return self.meta["count"] + self.pending_count + len(self.buffers["action"])
+
+    def append(self, state, action, reward, next_state, done):
+        """Records one transition of state tuples from KebabHunterEnvironment."""
+        buffers = self.buffers
+        buffers["state"].append(STATE_INDEX[state])
+        buffers["action"].append(action)
+        buffers["reward"].append(reward)
+        buffers["next_state"].append(STATE_INDEX[next_state])
+        buffers["done"].append(done)
+        if len(buffers["action"]) + self.pending_count >= self.chunk_size:
+            self.flush()
+
+    def append_batch(self, states, actions, rewards, next_states, dones):
+        """Records one transition per row, e.g. a step of a vector environment."""
+        self.stage_buffers()
+        self.pending.append({
+            "state": encode_states(states),
+            "action": actions,
+            "reward": rewards,
+            "next_state": encode_states(next_states),
+            "done": dones,
+        })
+        self.pending_count += len(actions)
+        if self.pending_count >= self.chunk_size:
+            self.flush()
+
+    def stage_buffers(self):
+        """Moves the single transitions into the pending batches, keeping the recording order."""
+        if self.buffers["action"]:
+            self.pending.append(self.buffers)
+            self.pending_count += len(self.buffers["action"])
+            self.buffers = {name: [] for name in COLUMNS}
+
+    def flush(self):
+        """Writes everything buffered so far, then publishes the new count in meta.json."""
+        self.stage_buffers()
+        if not self.pending:
+            return
+        for name, dtype in COLUMNS.items():
+            column = np.concatenate([np.asarray(batch[name], dtype=dtype) for batch in self.pending])
+            self.files[name].write(column.tobytes())
+        for f in self.files.values():
+            f.flush()
+            os.fsync(f.fileno())
+        self.meta["count"] += self.pending_count
+        self.pending, self.pending_count = [], 0
+        write_meta(self.path, self.meta)
+
+    def close(self):
+        self.flush()
+        for f in self.files.values():
+            f.close()
+        self.files = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class TransitionLog:
+    """Read-only view of a transition log, every column is a np.memmap of its file."""
+
+    def __init__(self, path):
+        self.path = path
+        self.meta = read_meta(path)
+        count = self.meta["count"]
+        self.columns = {}
+        for name, dtype in COLUMNS.items():
+            if count == 0:
+                self.columns[name] = np.empty(0, dtype=dtype)  # np.memmap cannot map an empty file
+            else:
+                self.columns[name] = np.memmap(os.path.join(path, f"{name}.bin"), dtype=dtype, mode="r", shape=(count,))
+
+    def __len__(self):
+        return self.meta["count"]
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def batches(self, batch_size):
+        """Yields consecutive (states, actions, rewards, next_states, dones) slices in recording order."""
+        for start in range(0, len(self), batch_size):
+            yield tuple(self.columns[name][start:start + batch_size] for name in COLUMNS)
+
+
+def load_logs(paths):
+    """Concatenates the columns of one or more logs into memory."""
+    logs = [TransitionLog(path) for path in ([paths] if isinstance(paths, str) else paths)]
+    return {name: np.concatenate([np.asarray(log[name]) for log in logs]) for name in COLUMNS}
+
+
+def collect(path, steps, num_envs=256, grid_size=3, num_bombs=2, num_kebabs=1, agent=None,
+            exploration_rate=1.0, max_steps=100, seed=None):
+    """
+    Records `steps` steps of num_envs boards of a vector environment into the log at path.
+    Actions come from the agent's epsilon-greedy policy, by default a uniform random one.
+    Returns the number of transitions written.
+    """
+    env = VectorKebabHunterEnv(num_envs, grid_size=grid_size, seed=seed, num_bombs=num_bombs, num_kebabs=num_kebabs)
+    if agent is None:
+        agent = QLearningAgent(8, 4, seed=make_rng(seed))
+    agent.exploration_rate = exploration_rate
+    extra = {"grid_size": grid_size, "num_bombs": num_bombs, "num_kebabs": num_kebabs, "exploration_rate": exploration_rate}
+    episode_steps = np.zeros(num_envs, dtype=np.int64)
+
+    with TransitionWriter(path, extra=extra) as writer:
+        states = env.get_states()
+        for _ in range(steps):
+            actions = agent.choose_actions(states)
+            next_states, rewards, dones = env.step(actions)
+            writer.append_batch(states, actions, rewards, next_states, dones)
+            episode_steps = np.where(dones, 0, episode_steps + 1)
+            timed_out = episode_steps >= max_steps
+            if timed_out.any():
+                env.reset_boards(np.flatnonzero(timed_out))
+                episode_steps[timed_out] = 0
+            states = env.get_states()
+        return len(writer)
+
+
+class SumTree:
+    """
+    Array-backed binary tree of non-negative weights for proportional sampling.
+    Leaves live at [size, 2 * size) and every parent holds the sum of its two children, so updating and
+    sampling a batch of B indices costs O(B log N) instead of a cumulative sum over all N weights.
+    """
+
+    def __init__(self, weights):
+        weights = np.asarray(weights, dtype=float)
+        self.count = len(weights)
+        self.size = 1 << max(0, int(np.ceil(np.log2(max(self.count, 1)))))
+        self.tree = np.zeros(2 * self.size)
+        self.tree[self.size:self.size + self.count] = weights
+        for level in range(int(np.log2(self.size)) - 1, -1, -1):
+            parents = np.arange(1 << level, 2 << level)
+            self.tree[parents] = self.tree[2 * parents] + self.tree[2 * parents + 1]
+
+    @property
+    def total(self):
+        return self.tree[1]
+
+    def get(self, indices):
+        return self.tree[self.size + np.asarray(indices)]
+
+    def update(self, indices, weights):
+        """Sets the weights of a batch of indices, repeated indices keep the last value like fancy assignment."""
+        nodes = self.size + np.asarray(indices)
+        self.tree[nodes] = weights
+        # Leaves share one depth, so every pass refreshes one level of parents; a parent listed twice gets
+        # the same sum twice, which is cheaper than deduplicating
+        nodes = nodes // 2
+        while len(nodes) and nodes[0] >= 1:
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+            nodes = nodes // 2
+
+    def sample(self, uniforms):
+        """Indices drawn with probability weight / total, one per uniform number in [0, 1)."""
+        values = np.asarray(uniforms) * self.total
+        nodes = np.ones(len(values), dtype=np.int64)
+        while nodes[0] < self.size:
+            left = self.tree[2 * nodes]
+            go_right = values >= left
+            values = np.where(go_right, values - left, values)
+            nodes = 2 * nodes + go_right
+        # Rounding can step past the last weight into the zero padding
+        return np.minimum(nodes - self.size, self.count - 1)
+
+
+def train_offline(paths, agent=None, epochs=1, batch_size=4096, prioritized=False, alpha=0.6, beta=0.4, seed=None):
+    """
+    Fits a Q-table to recorded transitions with batched update_q_rows calls, no simulation needed.
+    Uniform replay streams each log in recording order; prioritized replay draws batches with probability
+    proportional to (|TD error| + PRIORITY_EPSILON) ** alpha and corrects the bias with importance-sampling
+    weights (N * P) ** -beta, normalised by their maximum. Every epoch replays as many transitions as the logs hold.
+    Returns: the agent and the mean absolute TD error of every epoch
+    """
+    if agent is None:
+        agent = QLearningAgent(8, 4, seed=seed)
+    td_history = []
+
+    if not prioritized:
+        logs = [TransitionLog(path) for path in ([paths] if isinstance(paths, str) else paths)]
+        for _ in range(epochs):
+            td_sum, count = 0.0, 0
+            for log in logs:
+                for states, actions, rewards, next_states, _ in log.batches(batch_size):
+                    td_errors = agent.update_q_rows(states, actions, rewards, next_states)
+                    td_sum += np.abs(td_errors).sum()
+                    count += len(td_errors)
+            td_history.append(float(td_sum / max(count, 1)))
+        return agent, td_history
+
+    columns = load_logs(paths)
+    num_transitions = len(columns["action"])
+    if num_transitions == 0:
+        return agent, td_history
+    rng = make_rng(seed)
+    # Every transition starts at the same priority until its first replay measures its TD error.
+    # The tree holds priority ** alpha, so a batch only touches O(batch_size * log N) sums
+    priorities = SumTree(np.ones(num_transitions))
+    for _ in range(epochs):
+        td_sum = 0.0
+        for _ in range(-(-num_transitions // batch_size)):
+            indices = priorities.sample(rng.random(batch_size))
+            probabilities = priorities.get(indices) / priorities.total
+            weights = (num_transitions * probabilities) ** -beta
+            td_errors = agent.update_q_rows(columns["state"][indices], columns["action"][indices],
+                                            columns["reward"][indices], columns["next_state"][indices],
+                                            weights / weights.max())
+            priorities.update(indices, (np.abs(td_errors) + PRIORITY_EPSILON) ** alpha)
+            td_sum += np.abs(td_errors).sum()
+        td_history.append(float(td_sum / (-(-num_transitions // batch_size) * batch_size)))
+    return agent, td_history
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record transitions once, then train Q-tables offline from them")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    collect_parser = commands.add_parser("collect", help="record random-policy transitions from a vector environment")
+    collect_parser.add_argument("--output", required=True, help="log directory, appended to if it exists")
+    collect_parser.add_argument("--steps", type=int, default=1000)
+    collect_parser.add_argument("--num-envs", type=int, default=256)
+    collect_parser.add_argument("--grid-size", type=int, default=3)
+    collect_parser.add_argument("--num-bombs", type=int, default=2)
+    collect_parser.add_argument("--num-kebabs", type=int, default=1)
+    collect_parser.add_argument("--seed", type=int)
+
+    train_parser = commands.add_parser("train", help="fit a Q-table to one or more logs")
+    train_parser.add_argument("logs", nargs="+")
+    train_parser.add_argument("--epochs", type=int, default=10)
+    train_parser.add_argument("--batch-size", type=int, default=4096)
+    train_parser.add_argument("--learning-rate", type=float, default=0.2)
+    train_parser.add_argument("--discount-factor", type=float, default=0.95)
+    train_parser.add_argument("--prioritized", action="store_true")
+    train_parser.add_argument("--alpha", type=float, default=0.6)
+    train_parser.add_argument("--beta", type=float, default=0.4)
+    train_parser.add_argument("--seed", type=int)
+    train_parser.add_argument("--output", default="offline_q_table.khq")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.command == "collect":
+        count = collect(args.output, args.steps, args.num_envs, args.grid_size, args.num_bombs, args.num_kebabs,
+                        seed=args.seed)
+        print(f"Log '{args.output}' holds {count} transitions ({time.perf_counter() - start:.2f}s).")
+    else:
+        agent = QLearningAgent(8, 4, learning_rate=args.learning_rate, discount_factor=args.discount_factor,
+                               exploration_rate=0.0, seed=args.seed)
+        agent, td_history = train_offline(args.logs, agent, args.epochs, args.batch_size, args.prioritized,
+                                          args.alpha, args.beta, args.seed)
+        agent.save_checkpoint(args.output)
+        print(f"Mean |TD error| per epoch: {', '.join(f'{td:.4f}' for td in td_history)}")
+        print(f"Q-table ({agent.q_table_size()} of {NUM_STATES * 4} entries visited) saved to '{args.output}' "
+              f"({time.perf_counter() - start:.2f}s).")
@@ -0,0 +1,284 @@
+from environment import EMPTY, BOMB, KEBAB
+from seeding import BlockRandom
+import numpy as np
+
+try:
+    from numba import njit, config as numba_config
+    COMPILED = not numba_config.DISABLE_JIT
+except ImportError:  # Pure-Python fallback: the same kernel runs on memoryviews
+    njit = None
+    COMPILED = False
+
+# Uniform random numbers drawn per refill of a FusedRollout
+ROLLOUT_BLOCK_SIZE = 1 << 16
+# Layouts sampled per refill on boards too large for a layout table
+LAYOUT_POOL_SIZE = 1024
+# How an episode ended, per episode in FusedRollout.run
+OUTCOME_TIMEOUT, OUTCOME_SUCCESS, OUTCOME_BOMB = 0, 1, 2
+REWARD_NAMES = ("step", "wall_penalty", "kebab_reward", "bomb_penalty", "direction_bonus", "wrong_direction_penalty")
+
+
+def jit(function):
+    """Compiles with Numba when it is installed, otherwise leaves the function as plain Python."""
+    return njit(cache=True, nogil=True)(function) if COMPILED else function
+
+
+@jit
+def place_layout(layouts, width, num_kebabs, index, grid, kebabs, kebab_alive):
+    """Clears the occupancy grid and places layout `index`. Returns: the robot cell"""
+    for cell in range(len(grid)):
+        grid[cell] = EMPTY
+    start = index * width
+    for i in range(1 + num_kebabs, width):
+        grid[layouts[start + i]] = BOMB
+    for i in range(num_kebabs):
+        kebabs[i] = layouts[start + 1 + i]
+        kebab_alive[i] = 1
+        grid[kebabs[i]] = KEBAB
+    return int(layouts[start])
+
+
+@jit
+def kebab_bits(cell, grid_size, kebabs, kebab_alive):
+    """
+    Direction of the nearest remaining kebab as the state's bits: 1 above, 2 below, 4 right, 8 left,
+    which is also their contribution to the Q-table row. The first kebab wins ties, as in the environment.
+    """
+    row, col = cell // grid_size, cell % grid_size
+    best = -1
+    best_distance = 1 << 30
+    for i in range(len(kebabs)):
+        if kebab_alive[i]:
+            distance = abs(kebabs[i] // grid_size - row) + abs(kebabs[i] % grid_size - col)
+            if distance < best_distance:
+                best, best_distance = i, distance
+    if best < 0:
+        return 0
+    kebab_row, kebab_col = kebabs[best] // grid_size, kebabs[best] % grid_size
+    return (kebab_row < row) * 1 + (kebab_row > row) * 2 + (kebab_col > col) * 4 + (kebab_col < col) * 8
+
+
+@jit
+def danger_row(cell, moves, grid):
+    """
+    The danger values [above, below, right, left] of a cell encoded as their share of the Q-table row,
+    and -1 instead when every neighbour is a wall or a bomb (a deadlock).
+    """
+    row = 0
+    blocked = 0
+    # Actions in state order: up, down, right, left, with the row weights of q_learning.STATE_WEIGHTS
+    for action, weight in ((0, 16), (1, 48), (3, 144), (2, 432)):
+        neighbour = moves[cell * 4 + action]
+        if neighbour == cell:
+            danger = -1
+        elif grid[neighbour] == BOMB:
+            danger = 1
+        else:
+            danger = 0
+        blocked += danger != 0
+        row += (danger + 1) * weight
+    return -1 if blocked == 4 else row
+
+
+@jit
+def run_episodes(q_table, visited, layouts, width, num_layouts, num_kebabs, grid_size, moves, reward_values,
+                 randoms, position, episodes, max_steps, learning_rate, discount_factor, exploration_rate,
+                 exploration_decay, min_exploration_rate, grid, kebabs, kebab_alive,
+                 total_rewards, episode_steps, outcomes, exploration_rates):
+    """
+    Trains on whole episodes in one loop: epsilon-greedy choice, the environment step with its reward
+    shaping and deadlock reset, and the one-step Q-learning update of QLearningAgent.update_q_value.
+    q_table and visited are the flat agent tables, layouts the flat layout table, randoms a block of
+    uniform numbers consumed from `position`. Stops after `episodes` or when the block could run out
+    within the next episode. Returns: (episodes run, exploration rate, position)
+    """
+    step_reward, wall_penalty, kebab_reward, bomb_penalty = reward_values[0], reward_values[1], reward_values[2], reward_values[3]
+    direction_bonus, wrong_direction_penalty = reward_values[4], reward_values[5]
+    # Worst case: a layout draw, then per step an exploration draw, an action draw and a deadlock reset
+    last_start = len(randoms) - (1 + 3 * max_steps)
+    episode = 0
+    while episode < episodes and position <= last_start:
+        robot = place_layout(layouts, width, num_kebabs, int(randoms[position] * num_layouts), grid, kebabs, kebab_alive)
+        position += 1
+        remaining = num_kebabs
+        state = kebab_bits(robot, grid_size, kebabs, kebab_alive) + danger_row(robot, moves, grid)
+        total_reward = 0.0
+        outcome = OUTCOME_TIMEOUT
+        steps = 0
+        for _ in range(max_steps):
+            # Epsilon-greedy action, the first maximum on ties like np.argmax
+            base = state * 4
+            if randoms[position] < exploration_rate:
+                action = int(randoms[position + 1] * 4)
+                position += 2
+            else:
+                action = 0
+                for candidate in range(1, 4):
+                    if q_table[base + candidate] > q_table[base + action]:
+                        action = candidate
+                position += 1
+
+            cell = moves[robot * 4 + action]
+            danger = danger_row(cell, moves, grid)
+            steps += 1
+            done = False
+            if danger < 0:
+                # Deadlock: a new layout with a neutral reward, the episode goes on
+                robot = place_layout(layouts, width, num_kebabs, int(randoms[position] * num_layouts), grid,
+                                     kebabs, kebab_alive)
+                position += 1
+                remaining = num_kebabs
+                reward = 0.0
+                next_state = kebab_bits(robot, grid_size, kebabs, kebab_alive) + danger_row(robot, moves, grid)
+            else:
+                bits = kebab_bits(cell, grid_size, kebabs, kebab_alive)
+                reward = step_reward
+                if moves[cell * 4 + action] == cell:
+                    reward += wall_penalty  # Ends on the wall in the direction of the move, as in calculate_rewards
+                occupant = grid[cell]
+                if occupant == KEBAB:
+                    reward += kebab_reward
+                elif occupant == BOMB:
+                    reward += bomb_penalty
+                # Action bits in the same order: up 1, down 2, left 8, right 4
+                if bits & (1 << (action if action < 2 else 5 - action)):
+                    reward += direction_bonus
+                else:
+                    reward += wrong_direction_penalty
+                robot = cell
+                if occupant == KEBAB:
+                    grid[cell] = EMPTY
+                    for i in range(num_kebabs):
+                        if kebab_alive[i] and kebabs[i] == cell:
+                            kebab_alive[i] = 0
+                            break
+                    remaining -= 1
+                    if remaining == 0:
+                        done = True
+                        outcome = OUTCOME_SUCCESS
+                    bits = kebab_bits(cell, grid_size, kebabs, kebab_alive)  # Now points at the next kebab
+                elif occupant == BOMB:
+                    done = True
+                    outcome = OUTCOME_BOMB
+                next_state = bits + danger
+
+            # Q-learning update, bootstrapping from the next state even at the end like update_q_value
+            next_base = next_state * 4
+            max_next_q = q_table[next_base]
+            for candidate in range(1, 4):
+                if q_table[next_base + candidate] > max_next_q:
+                    max_next_q = q_table[next_base + candidate]
+            index = base + action
+            q_table[index] = q_table[index] + learning_rate * (reward + discount_factor * max_next_q - q_table[index])
+            visited[index] = True
+
+            state = next_state
+            total_reward += reward
+            if done:
+                break
+
+        exploration_rate = max(min_exploration_rate, exploration_rate * exploration_decay)
+        total_rewards[episode] = total_reward
+        episode_steps[episode] = steps
+        outcomes[episode] = outcome
+        exploration_rates[episode] = exploration_rate
+        episode += 1
+    return episode, exploration_rate, position
+
+
+class FusedRollout:
+    """
+    Runs whole training episodes of a QLearningAgent in run_episodes instead of a Python loop around
+    env.step and agent.update_q_value. The board size, rewards and layout distribution come from `env`,
+    which is only read, and the agent's Q-table and exploration rate are updated in place.
+    Random numbers are drawn in blocks from env.np_random, with get_state/set_state for exact resumes.
+    Without Numba the same kernel runs as Python on memoryviews; episodes follow the same rules as the
+    environment but not its random stream, so they differ from train_agent's default backend.
+    """
+
+    def __init__(self, env, agent, max_steps=100):
+        if agent.action_size != 4:
+            raise ValueError(f"FusedRollout needs an agent with 4 actions, got {agent.action_size}.")
+        self.agent = agent
+        self.max_steps = max_steps
+        self.grid_size = env.grid_size
+        self.num_kebabs = env.num_kebabs
+        self.width = 1 + env.num_kebabs + env.num_bombs
+        self.layout_sampler = env.layout_sampler
+        self.rng = env.np_random
+        self.moves = np.array(env.cell_moves, dtype=np.int64)
+        self.reward_values = np.array([env.feature_rewards[name] for name in REWARD_NAMES])
+        self.grid = np.zeros(env.grid_size * env.grid_size, dtype=np.uint8)
+        self.kebabs = np.zeros(env.num_kebabs, dtype=np.int64)
+        self.kebab_alive = np.zeros(env.num_kebabs, dtype=np.uint8)
+
+        table = self.layout_sampler.table
+        self.layout_table = None if table is None else np.ascontiguousarray(table).reshape(-1)
+        self.layouts = self.layout_table
+        self.randoms = np.empty(0)
+        self.position = 0
+        self.block_state = None  # Generator state the current block was drawn from
+
+    def refill(self):
+        """Draws the next block of random numbers, plus a fresh layout pool when there is no layout table."""
+        self.block_state = self.rng.bit_generator.state
+        self.randoms = self.rng.random(ROLLOUT_BLOCK_SIZE)
+        self.position = 0
+        if self.layout_table is None:
+            random = BlockRandom(self.rng)
+            pool = np.empty((LAYOUT_POOL_SIZE, self.width), dtype=np.int64)
+            for i in range(LAYOUT_POOL_SIZE):
+                robot_cell, kebab_cells, bomb_cells = self.layout_sampler.sample(random)
+                pool[i] = [robot_cell] + list(kebab_cells) + list(bomb_cells)
+            self.layouts = pool.reshape(-1)
+
+    def get_state(self):
+        """JSON-serialisable state, like BlockRandom.get_state."""
+        if self.block_state is None:
+            return {"bit_generator": self.rng.bit_generator.state, "position": None}
+        return {"bit_generator": self.block_state, "position": self.position}
+
+    def set_state(self, state):
+        """Restores a state from get_state, the following episodes repeat exactly."""
+        self.rng.bit_generator.state = state["bit_generator"]
+        self.randoms, self.position, self.block_state = np.empty(0), 0, None
+        if state["position"] is not None:
+            self.refill()
+            self.position = state["position"]
+
+    def run(self, episodes):
+        """
+        Trains for `episodes` episodes.
+        Returns: per-episode arrays "total_rewards", "steps", "outcomes" (OUTCOME_*) and "exploration_rates"
+        (after that episode's decay)
+        """
+        agent = self.agent
+        stats = {
+            "total_rewards": np.zeros(episodes),
+            "steps": np.zeros(episodes, dtype=np.int64),
+            "outcomes": np.zeros(episodes, dtype=np.int8),
+            "exploration_rates": np.zeros(episodes),
+        }
+        arrays = [agent.q_table.reshape(-1), agent.visited.reshape(-1), self.moves, self.grid, self.kebabs,
+                  self.kebab_alive] + list(stats.values())
+        reward_values = self.reward_values
+        if not COMPILED:
+            # The Python kernel indexes flat memoryviews, like QLearningAgent's Q-table
+            arrays = [memoryview(array) for array in arrays]
+            reward_values = reward_values.tolist()
+        q_table, visited, moves, grid, kebabs, kebab_alive = arrays[:6]
+        outputs = arrays[6:]
+
+        done = 0
+        while done < episodes:
+            if self.position > len(self.randoms) - (1 + 3 * self.max_steps):
+                self.refill()
+            layouts = self.layouts if COMPILED else memoryview(self.layouts)
+            randoms = self.randoms if COMPILED else memoryview(self.randoms)
+            count, agent.exploration_rate, self.position = run_episodes(
+                q_table, visited, layouts, self.width, len(self.layouts) // self.width, self.num_kebabs,
+                self.grid_size, moves, reward_values, randoms, self.position, episodes - done, self.max_steps,
+                agent.learning_rate, agent.discount_factor, agent.exploration_rate, agent.exploration_decay,
+                agent.min_exploration_rate, grid, kebabs, kebab_alive, *(output[done:] for output in outputs))
+            done += count
+        return stats
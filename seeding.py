@@ -0,0 +1,71 @@
+import numpy as np
+
+# Random numbers drawn per refill of a BlockRandom
+RANDOM_BLOCK_SIZE = 4096
+
+
+def make_rng(seed=None):
+    """Returns a numpy Generator from None, an int, a SeedSequence or an existing Generator."""
+    if isinstance(seed, np.random.Generator):
+        return seed
+    return np.random.default_rng(seed)
+
+
+def spawn_seeds(seed, count):
+    """Independent child SeedSequences, e.g. one per worker or per board, derived from one seed."""
+    if isinstance(seed, np.random.SeedSequence):
+        return seed.spawn(count)
+    return np.random.SeedSequence(seed).spawn(count)
+
+
+class BlockRandom:
+    """
+    Serves scalar random numbers from blocks pre-drawn with a numpy Generator.
+    One vectorised draw per block replaces a Python-level RNG call per number on the hot path.
+    """
+
+    def __init__(self, rng, block_size=RANDOM_BLOCK_SIZE):
+        self.rng = rng
+        self.block_size = block_size
+        self.block = []
+        self.index = 0
+        self.block_state = None  # Generator state the current block was drawn from
+
+    def random(self):
+        """Float in [0, 1)."""
+        if self.index == len(self.block):
+            self.block_state = self.rng.bit_generator.state
+            self.block = self.rng.random(self.block_size).tolist()
+            self.index = 0
+        value = self.block[self.index]
+        self.index += 1
+        return value
+
+    def get_state(self):
+        """JSON-serialisable state, compact since the current block can be redrawn from its generator state."""
+        if self.block_state is None:
+            return {"bit_generator": self.rng.bit_generator.state, "index": None}
+        return {"bit_generator": self.block_state, "index": self.index}
+
+    def set_state(self, state):
+        """Restores a state from get_state, the following draws repeat exactly."""
+        self.rng.bit_generator.state = state["bit_generator"]
+        self.block, self.index, self.block_state = [], 0, None
+        if state["index"] is not None:
+            self.random()
+            self.index = state["index"]
+
+    def randrange(self, stop):
+        """Integer in [0, stop)."""
+        return int(self.random() * stop)
+
+    def sample(self, population_size, k):
+        """k distinct integers from range(population_size), in draw order."""
+        chosen = []
+        seen = set()
+        while len(chosen) < k:
+            value = self.randrange(population_size)
+            if value not in seen:
+                seen.add(value)
+                chosen.append(value)
+        return chosen
@@ -0,0 +1,225 @@
+from environment import KebabHunterEnvironment
+from layouts import get_layout_table
+from q_learning import QLearningAgent, NUM_STATES, encode_state
+import numpy as np
+import argparse
+import time
+
+SOLVER_METHODS = ("value", "policy")
+
+
+def build_model(grid_size=3, num_bombs=2):
+    """
+    Enumerates the true MDP by running KebabHunterEnvironment.step from every robot cell of every
+    (kebab, bombs) configuration in the layout table, so rewards and dynamics are the environment's own.
+    Only single-kebab boards are solved, the kebab and bomb cells never change within an episode.
+    Returns a dict of arrays over the S true states:
+      next_state, reward, done, deadlock: (S, 4) outcome of every action
+      absorbing: (S,) robot already on the kebab or a bomb, never acted from
+      observation: (S,) Q-table row of the state's get_state() observation
+      start: (S,) probability of the state being drawn by reset()
+    """
+    layouts = get_layout_table(grid_size, num_bombs)
+    if layouts is None or len(layouts) == 0:
+        raise ValueError(f"No enumerable layouts for a {grid_size}x{grid_size} board with {num_bombs} bombs.")
+    layouts = np.asarray(layouts)
+    num_cells = grid_size * grid_size
+    env = KebabHunterEnvironment(grid_size=grid_size, num_bombs=num_bombs, seed=0)
+
+    # One block of num_cells states per (kebab, bombs) configuration, state = config * num_cells + robot cell
+    configs, config_of_layout = np.unique(layouts[:, 1:], axis=0, return_inverse=True)
+    config_of_layout = config_of_layout.reshape(-1)
+    num_states = len(configs) * num_cells
+    next_state = np.zeros((num_states, 4), dtype=np.int64)
+    reward = np.zeros((num_states, 4))
+    done = np.zeros((num_states, 4), dtype=bool)
+    deadlock = np.zeros((num_states, 4), dtype=bool)
+    absorbing = np.zeros(num_states, dtype=bool)
+    observation = np.zeros(num_states, dtype=np.int64)
+
+    for config_index, config in enumerate(configs.tolist()):
+        kebab_cells, bomb_cells = config[:1], config[1:]
+        for robot_cell in range(num_cells):
+            state = config_index * num_cells + robot_cell
+            observation[state] = encode_state(env.set_layout(robot_cell, kebab_cells, bomb_cells))
+            if robot_cell in config:
+                absorbing[state] = True
+                continue
+            for action in range(4):
+                env.set_layout(robot_cell, kebab_cells, bomb_cells)
+                # Walls block the move, like in step()
+                row, col = np.clip(env.get_new_position(action), 0, grid_size - 1).tolist()
+                next_state[state, action] = config_index * num_cells + row * grid_size + col
+                env.robot_position = [row, col]
+                # A deadlock reconfigures the board, the next state is a fresh draw from reset()
+                deadlock[state, action] = env.is_deadlock()
+                env.robot_position = list(divmod(robot_cell, grid_size))
+                _, reward[state, action], done[state, action] = env.step(action)
+
+    start = np.bincount(config_of_layout * num_cells + layouts[:, 0], minlength=num_states) / len(layouts)
+    return {
+        "grid_size": grid_size, "num_bombs": num_bombs,
+        "next_state": next_state, "reward": reward, "done": done, "deadlock": deadlock,
+        "absorbing": absorbing, "observation": observation, "start": start,
+    }
+
+
+def bellman_q(model, values, discount_factor):
+    """Q(s, a) = r + gamma * V(s'), with V = 0 after termination and E[V(start)] after a deadlock."""
+    restart_value = model["start"] @ values
+    next_values = np.where(model["deadlock"], restart_value, values[model["next_state"]])
+    return model["reward"] + discount_factor * np.where(model["done"], 0.0, next_values)
+
+
+def value_iteration(model, discount_factor=0.95, tolerance=1e-10, max_iterations=100000):
+    """Returns (Q, V, iterations) of the optimal values over the true states."""
+    values = np.zeros(len(model["absorbing"]))
+    for iteration in range(1, max_iterations + 1):
+        q_values = bellman_q(model, values, discount_factor)
+        new_values = np.where(model["absorbing"], 0.0, q_values.max(axis=1))
+        delta = np.abs(new_values - values).max()
+        values = new_values
+        if delta < tolerance:
+            break
+    q_values = np.where(model["absorbing"][:, None], 0.0, bellman_q(model, values, discount_factor))
+    return q_values, values, iteration
+
+
+def policy_iteration(model, discount_factor=0.95, tolerance=1e-10, max_iterations=1000, evaluation_sweeps=1000):
+    """Modified policy iteration: iterative evaluation of the greedy policy, then improvement until stable."""
+    num_states = len(model["absorbing"])
+    states = np.arange(num_states)
+    policy = np.zeros(num_states, dtype=np.int64)
+    values = np.zeros(num_states)
+    for iteration in range(1, max_iterations + 1):
+        for _ in range(evaluation_sweeps):
+            new_values = bellman_q(model, values, discount_factor)[states, policy]
+            new_values[model["absorbing"]] = 0.0
+            delta = np.abs(new_values - values).max()
+            values = new_values
+            if delta < tolerance:
+                break
+        q_values = bellman_q(model, values, discount_factor)
+        # Keep the current action on ties so the loop terminates
+        improved = np.where(q_values[states, policy] >= q_values.max(axis=1) - tolerance, policy, q_values.argmax(axis=1))
+        if np.array_equal(improved, policy):
+            break
+        policy = improved
+    q_values = np.where(model["absorbing"][:, None], 0.0, bellman_q(model, values, discount_factor))
+    return q_values, values, iteration
+
+
+def state_occupancy(model, policy, discount_factor=0.95, tolerance=1e-12, max_iterations=100000):
+    """
+    Discounted visitation d = mu + gamma * P_pi^T d from the reset distribution mu.
+    policy: (S, 4) action probabilities of the behaviour policy
+    """
+    num_states = len(model["absorbing"])
+    occupancy = model["start"].copy()
+    flow = np.where(model["absorbing"][:, None] | model["done"], 0.0, policy)
+    for _ in range(max_iterations):
+        moved = flow * occupancy[:, None]
+        arrivals = np.bincount(model["next_state"].reshape(-1), weights=np.where(model["deadlock"], 0.0, moved).reshape(-1),
+                               minlength=num_states)
+        arrivals += moved[model["deadlock"]].sum() * model["start"]
+        new_occupancy = model["start"] + discount_factor * arrivals
+        if np.abs(new_occupancy - occupancy).max() < tolerance:
+            return new_occupancy
+        occupancy = new_occupancy
+    return occupancy
+
+
+def solve_observed(model, weights, discount_factor=0.95, tolerance=1e-10, max_iterations=100000):
+    """
+    Value iteration on the aliased MDP seen through the 8-feature observation: every true state
+    contributes its transitions to its observation row with the given visitation weight.
+    Returns (Q, visited) in the (NUM_STATES, 4) layout of QLearningAgent.q_table.
+    """
+    acting = ~model["absorbing"]
+    rows = np.repeat(model["observation"][acting], 4)
+    actions = np.tile(np.arange(4), acting.sum())
+    keys = rows * 4 + actions
+    state_weights = np.repeat(weights[acting], 4)
+    total_weight = np.bincount(keys, weights=state_weights, minlength=NUM_STATES * 4)
+    visited = total_weight > 0
+    norm = np.where(visited, total_weight, 1.0)
+
+    reward = np.bincount(keys, weights=state_weights * model["reward"][acting].reshape(-1), minlength=NUM_STATES * 4) / norm
+    done = model["done"][acting].reshape(-1)
+    deadlock = model["deadlock"][acting].reshape(-1)
+    next_rows = model["observation"][model["next_state"][acting].reshape(-1)]
+    continue_weights = np.where(done | deadlock, 0.0, state_weights)
+    deadlock_share = np.bincount(keys, weights=np.where(deadlock, state_weights, 0.0), minlength=NUM_STATES * 4) / norm
+    start_rows = np.bincount(model["observation"], weights=model["start"], minlength=NUM_STATES)
+
+    values = np.zeros(NUM_STATES)
+    for _ in range(max_iterations):
+        continuation = np.bincount(keys, weights=continue_weights * values[next_rows], minlength=NUM_STATES * 4) / norm
+        q_values = reward + discount_factor * (continuation + deadlock_share * (start_rows @ values))
+        q_values = np.where(visited, q_values, 0.0).reshape(NUM_STATES, 4)
+        new_values = np.where(visited.reshape(NUM_STATES, 4).any(axis=1), q_values.max(axis=1, initial=-np.inf, where=visited.reshape(NUM_STATES, 4)), 0.0)
+        if np.abs(new_values - values).max() < tolerance:
+            break
+        values = new_values
+    return q_values, visited.reshape(NUM_STATES, 4)
+
+
+def solve(grid_size=3, num_bombs=2, discount_factor=0.95, method="value", behaviour="random"):
+    """
+    Solves the enumerated Kebab Hunter MDP.
+    behaviour: "random" or "optimal", the policy whose state visitation weights the aliased observations
+    Returns a dict with the true-state solution and the observation-level Q-table.
+    """
+    if method not in SOLVER_METHODS:
+        raise ValueError(f"Unknown method '{method}'. Expected one of {SOLVER_METHODS}.")
+    start = time.perf_counter()
+    model = build_model(grid_size, num_bombs)
+    model_seconds = time.perf_counter() - start
+
+    iterate = value_iteration if method == "value" else policy_iteration
+    q_true, v_true, iterations = iterate(model, discount_factor)
+
+    if behaviour == "random":
+        behaviour_policy = np.full((len(v_true), 4), 0.25)
+    else:
+        behaviour_policy = np.eye(4)[q_true.argmax(axis=1)]
+    weights = state_occupancy(model, behaviour_policy, discount_factor)
+    q_observed, visited = solve_observed(model, weights, discount_factor)
+
+    return {
+        "model": model,
+        "q_true": q_true,
+        "v_true": v_true,
+        "start_value": float(model["start"] @ v_true),
+        "iterations": iterations,
+        "q_observed": q_observed,
+        "visited": visited,
+        "model_seconds": model_seconds,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def to_agent(solution, **agent_kwargs):
+    """A QLearningAgent holding the observation-level Q-table, ready for save(), save_checkpoint() or GreedyPolicy."""
+    agent = QLearningAgent(8, 4, **agent_kwargs)
+    agent.q_table[:] = solution["q_observed"]
+    agent.visited[:] = solution["visited"]
+    return agent
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exact dynamic-programming solution of the Kebab Hunter MDP")
+    parser.add_argument("--grid-size", type=int, default=3)
+    parser.add_argument("--num-bombs", type=int, default=2)
+    parser.add_argument("--discount-factor", type=float, default=0.95)
+    parser.add_argument("--method", choices=SOLVER_METHODS, default="value")
+    parser.add_argument("--behaviour", choices=("random", "optimal"), default="random")
+    parser.add_argument("--output", default="solver_q_table.khq", help="checkpoint for the observation-level Q-table")
+    args = parser.parse_args()
+
+    solution = solve(args.grid_size, args.num_bombs, args.discount_factor, args.method, args.behaviour)
+    to_agent(solution, exploration_rate=0.0).save_checkpoint(args.output)
+    print(f"True states: {len(solution['v_true'])}, iterations: {solution['iterations']}, "
+          f"optimal start value: {solution['start_value']:.4f}, "
+          f"solved in {solution['seconds']:.2f}s (model {solution['model_seconds']:.2f}s). "
+          f"Q-table saved to '{args.output}'.")
@@ -0,0 +1,183 @@
+from environment import KebabHunterEnvironment, DEFAULT_REWARDS
+from q_learning import QLearningAgent
+from metrics import RingBuffer
+from policy import GreedyPolicy
+from evaluate import evaluate
+from seeding import make_rng, spawn_seeds
+from itertools import product
+import multiprocessing as mp
+import argparse
+import math
+import json
+import time
+import csv
+import os
+
+# Hyperparameters a trial passes to QLearningAgent, every other key must be a reward name of the environment
+AGENT_PARAMETERS = ("learning_rate", "discount_factor", "exploration_rate", "exploration_decay", "min_exploration_rate")
+SEARCH_MODES = ("grid", "random")
+RESULT_COLUMNS = ["trial", "seed", "episodes", "stopped_early", "final_average_reward", "best_average_reward",
+                  "success_rate", "bomb_hit_rate", "timeout_rate", "mean_return", "seconds"]
+
+
+def check_space(space):
+    unknown = set(space) - set(AGENT_PARAMETERS) - set(DEFAULT_REWARDS)
+    if unknown:
+        raise ValueError(f"Unknown hyperparameters {sorted(unknown)}. "
+                         f"Expected some of {list(AGENT_PARAMETERS) + list(DEFAULT_REWARDS)}.")
+
+
+def grid_search(space):
+    """Every combination of a {name: [values]} space, in a fixed order."""
+    check_space(space)
+    names = list(space)
+    for values in product(*(space[name] for name in names)):
+        yield dict(zip(names, values))
+
+
+def random_search(space, num_trials, seed=None):
+    """
+    num_trials independent draws from a space whose values are lists (uniform choice) or
+    {"low": ..., "high": ...} ranges (uniform, or log-uniform with "log": true).
+    """
+    check_space(space)
+    rng = make_rng(seed)
+    for _ in range(num_trials):
+        params = {}
+        for name, values in space.items():
+            if isinstance(values, dict):
+                if values.get("log"):
+                    params[name] = math.exp(rng.uniform(math.log(values["low"]), math.log(values["high"])))
+                else:
+                    params[name] = float(rng.uniform(values["low"], values["high"]))
+            else:
+                params[name] = values[int(rng.integers(len(values)))]
+        yield params
+
+
+def run_trial(trial, params, seed, episodes=20000, max_steps=100, window=100, check_every=1000, grace_episodes=5000,
+              min_average_reward=None, patience=None, eval_episodes=2000, grid_size=3, num_bombs=2, num_kebabs=1):
+    """
+    Trains one headless agent with the given hyperparameters, without run directories or TensorBoard.
+    Every check_every episodes after grace_episodes the rolling average reward over `window` episodes is checked:
+    the trial stops early below min_average_reward, or after `patience` checks without a new best average.
+    The greedy policy is then scored with evaluate() on the default rewards, so trials with different
+    reward settings stay comparable. Returns one row of the results table.
+    """
+    start = time.perf_counter()
+    env_seed, agent_seed, eval_seed = spawn_seeds(seed, 3)
+    rewards = {name: value for name, value in params.items() if name in DEFAULT_REWARDS}
+    agent_params = {name: value for name, value in params.items() if name in AGENT_PARAMETERS}
+    env = KebabHunterEnvironment(grid_size=grid_size, num_bombs=num_bombs, num_kebabs=num_kebabs, seed=env_seed,
+                                 rewards=rewards)
+    agent = QLearningAgent(len(env.get_state()), 4, seed=agent_seed, **agent_params)
+
+    recent_rewards = RingBuffer(window)
+    best_average = -float("inf")
+    checks_without_improvement = 0
+    stopped_early = False
+    episode = 0
+    while episode < episodes:
+        state = env.reset()
+        total_reward = 0
+        for step in range(max_steps):
+            action = agent.choose_action(state)
+            next_state, reward, done = env.step(action)
+            agent.update_q_value(state, action, reward, next_state)
+            state = next_state
+            total_reward += reward
+            if done:
+                break
+        agent.decay_exploration()
+        recent_rewards.append(total_reward)
+        episode += 1
+
+        if episode % check_every == 0:
+            average = recent_rewards.mean()
+            if average > best_average:
+                best_average, checks_without_improvement = average, 0
+            else:
+                checks_without_improvement += 1
+            if episode >= grace_episodes:
+                if (min_average_reward is not None and average < min_average_reward) or \
+                   (patience is not None and checks_without_improvement >= patience):
+                    stopped_early = True
+                    break
+
+    result = {"trial": trial, "seed": seed, **params, "episodes": episode, "stopped_early": stopped_early,
+              "final_average_reward": recent_rewards.mean(), "best_average_reward": max(best_average, recent_rewards.mean())}
+    if eval_episodes:
+        scores = evaluate(GreedyPolicy.from_agent(agent), episodes=eval_episodes, num_envs=min(256, eval_episodes),
+                          grid_size=grid_size, num_bombs=num_bombs, num_kebabs=num_kebabs, max_steps=max_steps,
+                          seed=eval_seed)
+        for name in ("success_rate", "bomb_hit_rate", "timeout_rate", "mean_return"):
+            result[name] = scores[name]
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def run_trial_task(task):
+    trial, params, seed, options = task
+    return run_trial(trial, params, seed, **options)
+
+
+def run_sweep(space, search="grid", num_trials=20, output="sweep_results.csv", num_workers=None, seed=0, **options):
+    """
+    Runs every trial of a grid or random search over a process pool. Each finished trial is appended to one
+    CSV table (hyperparameters, early-stopping outcome, rolling rewards and evaluation scores) as soon as it
+    completes, so an interrupted sweep keeps its results. options are passed on to run_trial.
+    Returns: the result rows, best success rate first
+    """
+    if search not in SEARCH_MODES:
+        raise ValueError(f"Unknown search '{search}'. Expected one of {SEARCH_MODES}.")
+    trials = list(grid_search(space) if search == "grid" else random_search(space, num_trials, seed))
+    trial_seeds = spawn_seeds(seed, len(trials))
+    # SeedSequence children are picklable, but the table records a plain int per trial
+    tasks = [(i, params, int(trial_seed.generate_state(1)[0]), options)
+             for i, (params, trial_seed) in enumerate(zip(trials, trial_seeds))]
+    columns = RESULT_COLUMNS[:2] + list(space) + RESULT_COLUMNS[2:]
+
+    results = []
+    num_workers = min(num_workers or os.cpu_count(), len(tasks)) or 1
+    with open(output, "w", newline="") as f, mp.get_context("spawn").Pool(num_workers) as pool:
+        writer = csv.DictWriter(f, fieldnames=columns, extrasaction="ignore")
+        writer.writeheader()
+        for result in pool.imap_unordered(run_trial_task, tasks):
+            writer.writerow(result)
+            f.flush()
+            results.append(result)
+            print(f"Trial {result['trial']} ({len(results)}/{len(tasks)} done): {json.dumps({name: result[name] for name in space})} "
+                  f"average reward {result['final_average_reward']:.3f}, success rate {result.get('success_rate', float('nan')):.3f}"
+                  f"{' (stopped early)' if result['stopped_early'] else ''}")
+    return sorted(results, key=lambda result: (result.get("success_rate", 0.0), result["final_average_reward"]), reverse=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parallel hyperparameter sweep for the Q-learning agent")
+    parser.add_argument("space", help='JSON search space or a path to one, e.g. \'{"learning_rate": [0.1, 0.2]}\'')
+    parser.add_argument("--search", choices=SEARCH_MODES, default="grid")
+    parser.add_argument("--trials", type=int, default=20, help="number of random search trials")
+    parser.add_argument("--episodes", type=int, default=20000)
+    parser.add_argument("--max-steps", type=int, default=100)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--check-every", type=int, default=1000)
+    parser.add_argument("--grace-episodes", type=int, default=5000)
+    parser.add_argument("--min-average-reward", type=float)
+    parser.add_argument("--patience", type=int)
+    parser.add_argument("--eval-episodes", type=int, default=2000)
+    parser.add_argument("--output", default="sweep_results.csv")
+    args = parser.parse_args()
+
+    if os.path.exists(args.space):
+        with open(args.space) as f:
+            space = json.load(f)
+    else:
+        space = json.loads(args.space)
+    results = run_sweep(space, args.search, args.trials, args.output, args.workers, args.seed,
+                        episodes=args.episodes, max_steps=args.max_steps, check_every=args.check_every,
+                        grace_episodes=args.grace_episodes, min_average_reward=args.min_average_reward,
+                        patience=args.patience, eval_episodes=args.eval_episodes)
+    best = results[0]
+    print(f"Best trial {best['trial']}: {json.dumps({name: best[name] for name in space})}, "
+          f"success rate {best.get('success_rate', float('nan')):.3f}. Results saved to '{args.output}'.")
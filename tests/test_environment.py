@@ -0,0 +1,40 @@
+import random
+
+import pytest
+
+from environment import KebabHunterEnvironment
+
+CONFIGS = [
+    {"grid_size": 3, "num_bombs": 2, "num_kebabs": 1},
+    {"grid_size": 3, "num_bombs": 4, "num_kebabs": 1},
+    {"grid_size": 4, "num_bombs": 3, "num_kebabs": 2},
+    {"grid_size": 9, "num_bombs": 20, "num_kebabs": 3},
+    {"grid_size": 4, "num_bombs": 2, "num_kebabs": 2, "rewards": {"wall_penalty": -2.0, "direction_bonus": 0.5}},
+]
+
+
+@pytest.mark.parametrize("config", CONFIGS)
+def test_feature_tables_match_grid_rules(config):
+    """Table-backed stepping follows the rules evaluated on the occupancy grid step for step."""
+    tables = KebabHunterEnvironment(seed=7, feature_tables=True, **config)
+    grid = KebabHunterEnvironment(seed=7, feature_tables=False, **config)
+    assert tables.reset() == grid.reset()
+
+    rng = random.Random(0)
+    episode_steps = 0
+    for _ in range(5000):
+        action = rng.randrange(4)
+        assert tables.step(action) == grid.step(action)
+        assert tables.robot_position == grid.robot_position
+        assert tables.kebab_positions == grid.kebab_positions
+        assert tables.get_state() == grid.get_state() == grid.compute_state()
+        assert tables.is_deadlock() == grid.is_deadlock()
+        episode_steps += 1
+        if grid.done or episode_steps == 50:
+            assert tables.reset() == grid.reset()
+            episode_steps = 0
+
+
+def test_feature_tables_default():
+    assert KebabHunterEnvironment(grid_size=3, num_bombs=2).feature_tables
+    assert not KebabHunterEnvironment(grid_size=16, num_bombs=20, num_kebabs=2).feature_tables
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+import rollout
+from environment import KebabHunterEnvironment
+from q_learning import QLearningAgent, STATE_INDEX
+
+CONFIGS = [
+    {"grid_size": 3, "num_bombs": 2, "num_kebabs": 1},
+    {"grid_size": 4, "num_bombs": 3, "num_kebabs": 2},
+    {"grid_size": 9, "num_bombs": 20, "num_kebabs": 3},
+]
+KERNELS = ["compiled", "python"] if rollout.COMPILED else ["python"]
+EPISODES = 300
+MAX_STEPS = 50
+
+
+def replay(randoms, layouts, config, exploration_decay):
+    """
+    Plays the kernel's random draws through env.set_layout, env.step and agent.update_q_value:
+    one draw picks each layout, including the one after a deadlock, one decides whether to explore
+    and exploring takes a second draw for the action.
+    """
+    env = KebabHunterEnvironment(**config)
+    agent = QLearningAgent(8, 4, exploration_decay=exploration_decay)
+    num_kebabs = config["num_kebabs"]
+    position = 0
+
+    def place():
+        nonlocal position
+        layout = layouts[int(randoms[position] * len(layouts))].tolist()
+        position += 1
+        return env.set_layout(layout[0], layout[1:1 + num_kebabs], layout[1 + num_kebabs:])
+
+    env.reset = place
+    total_rewards = []
+    for _ in range(EPISODES):
+        state = env.reset()
+        total_reward = 0
+        for _ in range(MAX_STEPS):
+            if randoms[position] < agent.exploration_rate:
+                action = int(randoms[position + 1] * 4)
+                position += 2
+            else:
+                action = int(np.argmax(agent.q_table[STATE_INDEX[state]]))
+                position += 1
+            next_state, reward, done = env.step(action)
+            agent.update_q_value(state, action, reward, next_state)
+            state = next_state
+            total_reward += reward
+            if done:
+                break
+        agent.decay_exploration()
+        total_rewards.append(total_reward)
+    return agent, np.array(total_rewards)
+
+
+@pytest.mark.parametrize("kernel", KERNELS)
+@pytest.mark.parametrize("config", CONFIGS)
+def test_kernel_matches_environment_rules(config, kernel, monkeypatch):
+    """run_episodes trains exactly like the environment and agent it replaces, given the same random draws."""
+    if kernel == "python" and rollout.COMPILED:
+        for name in ("place_layout", "kebab_bits", "danger_row", "run_episodes"):
+            monkeypatch.setattr(rollout, name, getattr(rollout, name).py_func)
+        monkeypatch.setattr(rollout, "COMPILED", False)
+
+    env = KebabHunterEnvironment(seed=1, **config)
+    agent = QLearningAgent(8, 4, seed=2, exploration_decay=0.99)
+    fused = rollout.FusedRollout(env, agent, max_steps=MAX_STEPS)
+    fused.refill()
+    randoms = fused.randoms.copy()
+    layouts = fused.layouts.reshape(-1, fused.width).copy()
+    stats = fused.run(EPISODES)
+    assert np.array_equal(fused.randoms, randoms)  # One block covered every episode
+
+    reference, total_rewards = replay(randoms, layouts, config, exploration_decay=0.99)
+    np.testing.assert_allclose(agent.q_table, reference.q_table, rtol=0, atol=1e-12)
+    np.testing.assert_array_equal(agent.visited, reference.visited)
+    np.testing.assert_allclose(stats["total_rewards"], total_rewards, rtol=0, atol=1e-12)
+    assert agent.exploration_rate == reference.exploration_rate
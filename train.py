@@ -1,21 +1,54 @@
 from setting import *
 from environment import KebabHunterEnvironment
 from q_learning import QLearningAgent
-from torch.utils.tensorboard import SummaryWriter
+from planning import PlanningAgent
+from metrics import MetricsLogger
+from replay import TransitionWriter
+from profiling import Instrumentation, SamplingProfiler
+from rollout import FusedRollout
+from seeding import spawn_seeds
 import os
-import pickle  # Add this import for loading the Q-table
+
+# "python" steps the environment and agent objects, "fused" runs whole episodes in rollout.run_episodes
+TRAIN_BACKENDS = ("python", "fused")
 
 def get_unique_run_dir(base_dir):
-    """Generate a unique run directory name."""
-    for i in range(1, 1000):  # Supports up to 999 runs
-        run_dir = os.path.join(base_dir, f"run{i}")
-        if not os.path.exists(run_dir):
-            return run_dir
-    raise RuntimeError("Too many runs, please clean up the base directory.")
-
-def train_agent(episodes=10000000, max_steps=100, resume=False):
-    os.makedirs(SAVE_DIR, exist_ok=True)
-    unique_run_dir = get_unique_run_dir(SAVE_DIR)
+    """Generate a unique run directory name, one past the highest existing runN."""
+    numbers = [int(name[3:]) for name in os.listdir(base_dir) if name.startswith("run") and name[3:].isdigit()] \
+        if os.path.isdir(base_dir) else []
+    return os.path.join(base_dir, f"run{max(numbers, default=0) + 1}")
+
+def train_agent(episodes=10000000, max_steps=100, resume=False, logging="async", log_every=1, seed=None,
+                grid_size=3, num_bombs=2, num_kebabs=1, save_dir=SAVE_DIR, checkpoint_every=100000,
+                record_transitions=False, instrument=False, instrument_every=1000, sample_episodes=None,
+                sample_interval=0.001, backend="python", planning_steps=0, planning="prioritized"):
+    """
+    Trains a Q-learning agent and saves its Q-table.
+    logging: "async" writes TensorBoard scalars from a background thread, "sync" writes them inline,
+             "none" keeps the metrics in memory only
+    log_every: stride, in episodes, between TensorBoard writes
+    seed: makes the run reproducible, the environment and agent get independent child streams
+    save_dir: parent directory of the runN folders
+    checkpoint_every: episodes between atomic checkpoints of the full training state, 0 disables them
+    record_transitions: also stream every transition to runN/transitions for replay.train_offline
+    instrument: time env reset/step, agent act/update and logging; every instrument_every episodes the
+                aggregates go to TensorBoard (perf/ tags) and at the end to runN/logs/profile.json
+    sample_episodes: (first, last) episode window to run the sampling profiler for, written as collapsed
+                     stacks to runN/logs/profile.collapsed for flame graphs
+    resume: path of a pickled Q-table, or of a checkpoint to continue from its episode, exploration rate
+            and random streams
+    backend: "fused" trains in rollout.FusedRollout, compiled with Numba when installed, and hands the episode
+             statistics back in chunks for logging; it cannot record transitions or instrument the loop
+    planning_steps: simulated backups per real step with a planning.PlanningAgent, planning="prioritized"
+                    (prioritized sweeping) or "uniform" (Dyna-Q); the learned model is not checkpointed
+    """
+    if backend not in TRAIN_BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}'. Expected one of {TRAIN_BACKENDS}.")
+    if backend == "fused" and (record_transitions or instrument or sample_episodes or planning_steps):
+        raise ValueError("record_transitions, instrument, sample_episodes and planning_steps need backend='python'.")
+
+    os.makedirs(save_dir, exist_ok=True)
+    unique_run_dir = get_unique_run_dir(save_dir)
     os.makedirs(unique_run_dir, exist_ok=True)
 
     log_dir = os.path.join(unique_run_dir, "logs")
@@ -23,68 +56,157 @@ def train_agent(episodes=10000000, max_steps=100, resume=False):
     os.makedirs(log_dir, exist_ok=True)
     os.makedirs(table_dir, exist_ok=True)
 
-    env = KebabHunterEnvironment()
+    env_seed, agent_seed = spawn_seeds(seed, 2)
+    env = KebabHunterEnvironment(grid_size=grid_size, num_bombs=num_bombs, num_kebabs=num_kebabs, seed=env_seed)
     state_size = len(env.get_state())
     action_size = 4  # Up, Down, Left, Right
-    agent = QLearningAgent(state_size, action_size)
+    if planning_steps:
+        agent = PlanningAgent(state_size, action_size, planning_steps, planning, seed=agent_seed)
+    else:
+        agent = QLearningAgent(state_size, action_size, seed=agent_seed)
+    rollout = FusedRollout(env, agent, max_steps) if backend == "fused" else None
 
     # Resume training by loading the Q-table if specified
+    start_episode = 0
     if resume:
         q_table_path = resume
         if os.path.exists(q_table_path):
-            with open(q_table_path, "rb") as f:
-                agent.q_table = pickle.load(f)
-            print(f"Resumed training with Q-table loaded from '{q_table_path}'.")
+            header = agent.load(q_table_path)
+            if header is not None:
+                start_episode = header["episode"]
+                rng_states = header["extra"].get("rng_states")
+                if rng_states:
+                    env.random.set_state(rng_states["env"])
+                    agent.random.set_state(rng_states["agent"])
+                    if rollout is not None and "rollout" in rng_states:
+                        rollout.set_state(rng_states["rollout"])
+            print(f"Resumed training with Q-table loaded from '{q_table_path}' at episode {start_episode}.")
         else:
             print(f"No Q-table found at '{q_table_path}'. Starting fresh.")
 
-    # Initialize TensorBoard writer
-    writer = SummaryWriter(log_dir=log_dir)
-
-    total_rewards = []
-    new_state_action_pairs = set(agent.q_table.keys())  # Initialize with existing state-action pairs
-
-    for episode in range(episodes):
-        state = env.reset()
-        total_reward = 0
-
-        for step in range(max_steps):
-            action = agent.choose_action(state)
-            next_state, reward, done = env.step(action)
-
-            # Track new state-action pairs
-            new_state_action_pairs.add((tuple(state), action))
-
-            # Update Q-value
-            agent.update_q_value(state, action, reward, next_state)
-            state = next_state
-            total_reward += reward
-
-            if done:
-                break
-
-        agent.decay_exploration()
-        total_rewards.append(total_reward)
-
-        # Log metrics to TensorBoard
-        writer.add_scalar("Total Reward", total_reward, episode)
-        writer.add_scalar("Exploration Rate", agent.exploration_rate, episode)
-        writer.add_scalar("Q-Table Size", len(new_state_action_pairs), episode)
-
+    # Initialize TensorBoard logging
+    metrics = MetricsLogger(log_dir=log_dir, mode=logging, log_every=log_every)
+
+    checkpoint_path = os.path.join(table_dir, "checkpoint.khq")
+    writer = TransitionWriter(os.path.join(unique_run_dir, "transitions")) if record_transitions else None
+
+    def write_checkpoint(completed_episodes):
+        rng_states = {"env": env.random.get_state(), "agent": agent.random.get_state()}
+        if rollout is not None:
+            rng_states["rollout"] = rollout.get_state()
+        agent.save_checkpoint(checkpoint_path, completed_episodes, extra={"rng_states": rng_states})
+
+    # The loop calls these names, instrumentation swaps in timed versions so it costs nothing when off
+    env_reset, env_step = env.reset, env.step
+    choose_action, update_q_value = agent.choose_action, agent.update_q_value
+    log_scalars = metrics.log_scalars
+    instrumentation = Instrumentation(instrument_every) if instrument else None
+    if instrumentation is not None:
+        env_reset = instrumentation.wrap("env.reset", env_reset)
+        env_step = instrumentation.wrap("env.step", env_step)
+        choose_action = instrumentation.wrap("agent.act", choose_action)
+        update_q_value = instrumentation.wrap("agent.update", update_q_value)
+        log_scalars = instrumentation.wrap("logging", log_scalars)
+        write_checkpoint = instrumentation.wrap("checkpoint", write_checkpoint)
+    sampler = SamplingProfiler(sample_interval) if sample_episodes else None
+
+    def report_progress(episode, total_reward, exploration_rate):
+        """Prints the progress every 100 episodes and writes the periodic checkpoint, once `episode` is done."""
         # Log average reward every 100 episodes
         if (episode + 1) % 100 == 0:
-            avg_reward = sum(total_rewards[-100:]) / 100
-            writer.add_scalar("Average Reward (last 100)", avg_reward, episode)
-            print(f"Episode {episode + 1}/{episodes}, Total Reward: {total_reward}, Average Reward: {avg_reward:.2f}, Exploration Rate: {agent.exploration_rate:.4f}, Q-Table Size: {len(new_state_action_pairs)}")
+            avg_reward = metrics.average_reward()
+            q_table_size = agent.q_table_size()
+            log_scalars(episode, {"Average Reward (last 100)": avg_reward})
+            print(f"Episode {episode + 1}/{episodes}, Total Reward: {total_reward}, Average Reward: {avg_reward:.2f}, Exploration Rate: {exploration_rate:.4f}, Q-Table Size: {q_table_size}")
+
+        # Periodic checkpoint, a crash loses at most checkpoint_every episodes
+        if checkpoint_every and (episode + 1) % checkpoint_every == 0:
+            write_checkpoint(episode + 1)
+
+    if rollout is not None:
+        episode = start_episode
+        while episode < episodes:
+            # One kernel call up to the next progress print or checkpoint, the statistics are logged in bulk
+            chunk_end = min(episodes, (episode // 100 + 1) * 100)
+            if checkpoint_every:
+                chunk_end = min(chunk_end, (episode // checkpoint_every + 1) * checkpoint_every)
+            stats = rollout.run(chunk_end - episode)
+            metrics.record_episodes(stats["total_rewards"])
+            total_rewards, exploration_rates = stats["total_rewards"].tolist(), stats["exploration_rates"].tolist()
+
+            q_table_size = agent.q_table_size()  # As of the end of the chunk
+            logged_episodes = range(-(-episode // log_every) * log_every, chunk_end, log_every) \
+                if metrics.mode != "none" else ()
+            for logged in logged_episodes:
+                if metrics.should_log(logged):
+                    log_scalars(logged, {
+                        "Total Reward": total_rewards[logged - episode],
+                        "Exploration Rate": exploration_rates[logged - episode],
+                        "Q-Table Size": q_table_size,
+                    })
+            report_progress(chunk_end - 1, total_rewards[-1], exploration_rates[-1])
+            episode = chunk_end
+    else:
+        for episode in range(start_episode, episodes):
+            if sampler is not None and episode == sample_episodes[0]:
+                sampler.start()
+            state = env_reset()
+            total_reward = 0
+
+            for step in range(max_steps):
+                action = choose_action(state)
+                next_state, reward, done = env_step(action)
+
+                # Update Q-value
+                update_q_value(state, action, reward, next_state)
+                if writer is not None:
+                    writer.append(state, action, reward, next_state, done)
+                state = next_state
+                total_reward += reward
+
+                if done:
+                    break
+
+            agent.decay_exploration()
+            metrics.record_episode(total_reward)
+
+            # Log metrics to TensorBoard
+            if metrics.should_log(episode):
+                log_scalars(episode, {
+                    "Total Reward": total_reward,
+                    "Exploration Rate": agent.exploration_rate,
+                    "Q-Table Size": agent.q_table_size(),
+                })
+            report_progress(episode, total_reward, agent.exploration_rate)
+
+            if instrumentation is not None:
+                snapshot = instrumentation.end_episode()
+                if snapshot is not None:
+                    metrics.log_scalars(episode, instrumentation.scalars(snapshot))
+            if sampler is not None and episode == sample_episodes[1]:
+                sampler.stop()
 
     # Save the Q-table
     q_table_path = os.path.join(table_dir, "q_table.pkl")
-    with open(q_table_path, "wb") as f:
-        pickle.dump(agent.q_table, f)
+    agent.save(q_table_path)
+    write_checkpoint(max(episodes, start_episode))
     print(f"Training completed. Q-table saved to '{q_table_path}'.")
 
-    # Close TensorBoard writer
-    writer.close()
+    if writer is not None:
+        writer.close()
+    if instrumentation is not None:
+        profile_path = os.path.join(log_dir, "profile.json")
+        instrumentation.write_json(profile_path)
+        print(f"Instrumentation summary saved to '{profile_path}'.")
+    if sampler is not None:
+        sampler.stop()
+        collapsed_path = os.path.join(log_dir, "profile.collapsed")
+        sampler.write_collapsed(collapsed_path)
+        print(f"{sampler.samples} stack samples saved to '{collapsed_path}'.")
+
+    # Flush and close TensorBoard logging
+    metrics.close()
+    return agent, metrics
 
 if __name__ == "__main__":
     # Pass `resume=True` to resume training
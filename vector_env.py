@@ -0,0 +1,182 @@
+import numpy as np
+from environment import KebabHunterEnvironment, EMPTY, BOMB, KEBAB, GRID_CHANNELS
+from seeding import spawn_seeds
+
+# Row/column offsets for the actions: 0 = up, 1 = down, 2 = left, 3 = right
+ACTION_DELTAS = np.array([[-1, 0], [1, 0], [0, -1], [0, 1]])
+# Index into the kebab direction features [above, below, right, left] that matches each action
+ACTION_TO_DIRECTION = np.array([0, 1, 3, 2])
+# Offsets of the danger features [above, below, right, left]
+DANGER_DELTAS = np.array([[-1, 0], [1, 0], [0, 1], [0, -1]])
+
+
+def neighbour_cells(robot_positions, deltas, grid_size):
+    """Flat cell index of each robot's neighbours and whether they are on the board, both (N, 4)."""
+    neighbours = robot_positions[:, None, :] + deltas[None, :, :]
+    inside = np.all((neighbours >= 0) & (neighbours < grid_size), axis=2)
+    clipped = np.clip(neighbours, 0, grid_size - 1)
+    return clipped[:, :, 0] * grid_size + clipped[:, :, 1], inside
+
+
+def nearest_kebabs(robot_positions, kebab_positions, kebab_alive):
+    """Position of the closest remaining kebab of every board (first one on ties) and whether one is left."""
+    distances = np.abs(kebab_positions - robot_positions[:, None, :]).sum(axis=2)
+    distances = np.where(kebab_alive, distances, np.iinfo(distances.dtype).max)
+    nearest = kebab_positions[np.arange(len(robot_positions)), distances.argmin(axis=1)]
+    return nearest, kebab_alive.any(axis=1)
+
+
+def compute_states(robot_positions, kebab_positions, kebab_alive, grids, grid_size):
+    """
+    Returns the (N, 8) int8 state array matching KebabHunterEnvironment.get_state for every board.
+    grids are the flat (N, grid_size * grid_size) occupancy grids, so the cost does not depend on the bomb count.
+    """
+    robot_row, robot_col = robot_positions[:, 0], robot_positions[:, 1]
+    kebab, has_kebab = nearest_kebabs(robot_positions, kebab_positions, kebab_alive)
+    states = np.zeros((len(robot_positions), 8), dtype=np.int8)
+
+    # Direction of the nearest kebab relative to the robot
+    states[:, 0] = has_kebab & (kebab[:, 0] < robot_row)  # Kebab is above
+    states[:, 1] = has_kebab & (kebab[:, 0] > robot_row)  # Kebab is below
+    states[:, 2] = has_kebab & (kebab[:, 1] > robot_col)  # Kebab is to the right
+    states[:, 3] = has_kebab & (kebab[:, 1] < robot_col)  # Kebab is to the left
+
+    # Walls (-1) and bombs (1), in [above, below, right, left] order
+    cells, inside = neighbour_cells(robot_positions, DANGER_DELTAS, grid_size)
+    bomb = np.take_along_axis(grids, cells, axis=1) == BOMB
+    states[:, 4:] = np.where(inside, bomb, -1)
+    return states
+
+
+class VectorKebabHunterEnv:
+    """
+    Steps N independent Kebab Hunter boards at once with NumPy array operations.
+    Board i follows the same rules, rewards and layouts as KebabHunterEnvironment(seed=spawn_seeds(seed, N)[i]).
+    Boards are stored as flat uint8 occupancy grids, the per-step cost does not grow with the number of bombs.
+    Finished boards are reset automatically at the end of step().
+    """
+
+    def __init__(self, num_envs, grid_size=3, seed=None, num_bombs=2, num_kebabs=1, rewards=None):
+        self.num_envs = num_envs
+        self.grid_size = grid_size
+        self.num_bombs = num_bombs
+        self.num_kebabs = num_kebabs
+
+        # Scalar environments are only used to draw layouts, so each board replays its scalar twin
+        self.layout_envs = [
+            KebabHunterEnvironment(grid_size=grid_size, seed=board_seed, num_bombs=num_bombs, num_kebabs=num_kebabs,
+                                   rewards=rewards, feature_tables=False)
+            for board_seed in spawn_seeds(seed, num_envs)
+        ]
+        self.rewards = self.layout_envs[0].rewards
+
+        self.grids = np.zeros((num_envs, grid_size * grid_size), dtype=np.uint8)
+        self.robot_positions = np.zeros((num_envs, 2), dtype=np.int64)
+        self.kebab_positions = np.zeros((num_envs, num_kebabs, 2), dtype=np.int64)
+        self.kebab_alive = np.zeros((num_envs, num_kebabs), dtype=bool)
+        self.states = np.zeros((num_envs, 8), dtype=np.int8)
+        self.info = {}  # Per-board outcome flags of the last step
+        # The scalar environments already drew their first layout when they were created
+        self.load_boards(np.arange(num_envs))
+
+    def load_boards(self, indices):
+        """Copies the current layout of the given boards' scalar environments into the arrays."""
+        for i in indices:
+            env = self.layout_envs[i]
+            self.grids[i] = env.grid.reshape(-1)
+            self.robot_positions[i] = env.robot_position
+            self.kebab_positions[i] = env.kebab_positions
+            self.kebab_alive[i] = True
+        self.states[indices] = self.compute_states(indices)
+
+    def compute_states(self, indices):
+        return compute_states(
+            self.robot_positions[indices], self.kebab_positions[indices], self.kebab_alive[indices],
+            self.grids[indices], self.grid_size
+        )
+
+    def reset_boards(self, indices):
+        """Draws a new layout for the given boards and refreshes their states."""
+        for i in indices:
+            self.layout_envs[i].reset()
+        self.load_boards(indices)
+
+    def reset(self):
+        """Resets every board and returns the (N, 8) state array."""
+        self.reset_boards(np.arange(self.num_envs))
+        return self.states.copy()
+
+    def get_states(self):
+        """Returns the states the next batch of actions should be chosen from."""
+        return self.states.copy()
+
+    def get_grid_observations(self):
+        """(N, GRID_CHANNELS, grid_size, grid_size) uint8 planes, see KebabHunterEnvironment.get_grid_observation."""
+        observations = np.zeros((self.num_envs, GRID_CHANNELS, self.grid_size * self.grid_size), dtype=np.uint8)
+        robot_cells = self.robot_positions[:, 0] * self.grid_size + self.robot_positions[:, 1]
+        observations[np.arange(self.num_envs), 0, robot_cells] = 1
+        observations[:, 1] = self.grids == KEBAB
+        observations[:, 2] = self.grids == BOMB
+        return observations.reshape(self.num_envs, GRID_CHANNELS, self.grid_size, self.grid_size)
+
+    def step(self, actions):
+        """
+        Applies one action per board.
+        Returns: next_states, rewards, dones
+        Rows of next_states for finished boards hold the terminal state; those boards are already
+        reset and their new start state is available from get_states().
+        self.info holds the "hit_bomb", "collected_kebab" and "deadlock" flags of every board.
+        """
+        actions = np.asarray(actions, dtype=np.int64)
+        grid_size = self.grid_size
+        rewards_table = self.rewards
+        boards = np.arange(self.num_envs)
+
+        # Move the robots, walls block the move
+        robot = np.clip(self.robot_positions + ACTION_DELTAS[actions], 0, grid_size - 1)
+        self.robot_positions = robot
+        robot_row, robot_col = robot[:, 0], robot[:, 1]
+        robot_cells = robot_row * grid_size + robot_col
+        occupant = self.grids[boards, robot_cells]
+
+        # Deadlock: no neighbouring cell is inside the grid and free of bombs
+        cells, inside = neighbour_cells(robot, ACTION_DELTAS, grid_size)
+        deadlock = ~np.any(inside & (np.take_along_axis(self.grids, cells, axis=1) != BOMB), axis=1)
+
+        # Rewards, summed in the same order as KebabHunterEnvironment.calculate_rewards
+        at_kebab = occupant == KEBAB
+        on_bomb = occupant == BOMB
+        hit_wall = ((actions == 0) & (robot_row == 0)) | \
+                   ((actions == 1) & (robot_row == grid_size - 1)) | \
+                   ((actions == 2) & (robot_col == 0)) | \
+                   ((actions == 3) & (robot_col == grid_size - 1))
+
+        states = compute_states(robot, self.kebab_positions, self.kebab_alive, self.grids, grid_size)
+        towards_kebab = states[boards, ACTION_TO_DIRECTION[actions]].astype(bool)
+
+        rewards = np.full(self.num_envs, rewards_table["step"])
+        rewards = rewards + np.where(hit_wall, rewards_table["wall_penalty"], 0.0)
+        rewards = rewards + np.where(at_kebab, rewards_table["kebab_reward"], 0.0)
+        rewards = rewards + np.where(on_bomb, rewards_table["bomb_penalty"], 0.0)
+        rewards = rewards + np.where(towards_kebab, rewards_table["direction_bonus"], rewards_table["wrong_direction_penalty"])
+
+        # Collect kebabs, the state then points at the next nearest one
+        collected = np.flatnonzero(at_kebab & ~deadlock)
+        if len(collected):
+            self.grids[collected, robot_cells[collected]] = EMPTY
+            self.kebab_alive[collected] &= ~np.all(self.kebab_positions[collected] == robot[collected, None, :], axis=2)
+            states[collected] = self.compute_states(collected)
+        dones = (on_bomb | (at_kebab & ~self.kebab_alive.any(axis=1))) & ~deadlock
+        self.info = {"hit_bomb": on_bomb & ~deadlock, "collected_kebab": at_kebab & ~deadlock, "deadlock": deadlock}
+
+        # Deadlocked boards are reconfigured with a neutral reward, like the scalar environment
+        self.states = states.copy()
+        if deadlock.any():
+            rewards[deadlock] = 0.0
+            self.reset_boards(np.flatnonzero(deadlock))
+            states = self.states.copy()
+
+        if dones.any():
+            self.reset_boards(np.flatnonzero(dones))
+
+        return states, rewards, dones